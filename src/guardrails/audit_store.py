@@ -5,6 +5,7 @@ Provides comprehensive audit trail for all guardrail actions.
 
 import logging
 import os
+import time
 from datetime import datetime
 from typing import Any
 
@@ -16,6 +17,17 @@ from .models import ActionExecution
 
 logger = logging.getLogger(__name__)
 
+# DynamoDB BatchWriteItem accepts at most 25 put requests per call
+BATCH_WRITE_MAX_ITEMS = 25
+
+# Attempts per BatchWriteItem request while DynamoDB returns UnprocessedItems;
+# the delay before each resend doubles from the base delay
+BATCH_WRITE_MAX_ATTEMPTS = 5
+BATCH_WRITE_BASE_DELAY_SECONDS = 0.05
+
+# DynamoDB TransactWriteItems accepts at most 100 actions per request
+TRANSACT_WRITE_MAX_ITEMS = 100
+
 
 class AuditStore:
     """Store and retrieve execution records in DynamoDB."""
@@ -59,6 +71,98 @@ class AuditStore:
             )
             return False
 
+    def save_executions_batch(self, executions: list[ActionExecution]) -> bool:
+        """Save multiple execution records using batched writes.
+
+        Records are sent in BatchWriteItem requests of up to
+        BATCH_WRITE_MAX_ITEMS, so N records cost ceil(N / 25) round-trips
+        instead of N. Items DynamoDB returns as UnprocessedItems (throttling)
+        are resent with exponential backoff, up to BATCH_WRITE_MAX_ATTEMPTS
+        per request.
+
+        Args:
+            executions: ActionExecutions to save
+
+        Returns:
+            True if all were saved successfully, False otherwise (some records
+            may already have been written)
+        """
+        if not executions:
+            return True
+
+        try:
+            for start in range(0, len(executions), BATCH_WRITE_MAX_ITEMS):
+                chunk = executions[start : start + BATCH_WRITE_MAX_ITEMS]
+                request_items = {
+                    self.table_name: [
+                        {"PutRequest": {"Item": self._execution_to_item(execution)}}
+                        for execution in chunk
+                    ]
+                }
+
+                for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+                    if attempt:
+                        time.sleep(BATCH_WRITE_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+                    response = self.dynamodb.batch_write_item(RequestItems=request_items)
+                    request_items = response.get("UnprocessedItems")
+                    if not request_items:
+                        break
+                else:
+                    unprocessed = len(request_items[self.table_name])
+                    logger.error(
+                        f"Failed to save {unprocessed} executions: still unprocessed "
+                        f"after {BATCH_WRITE_MAX_ATTEMPTS} attempts"
+                    )
+                    return False
+
+            logger.info(f"Saved {len(executions)} executions to audit store")
+            return True
+
+        except ClientError as e:
+            logger.error(f"Failed to save {len(executions)} executions: {e}", exc_info=True)
+            return False
+
+    def save_executions_transact(self, executions: list[ActionExecution]) -> bool:
+        """Save multiple execution records with TransactWriteItems.
+
+        Unlike save_executions_batch, each request is all-or-nothing: either
+        every record in it is written or none is. Lists longer than
+        TRANSACT_WRITE_MAX_ITEMS are split into several transactions, and
+        atomicity holds per transaction only.
+
+        Args:
+            executions: ActionExecutions to save
+
+        Returns:
+            True if all were saved successfully, False otherwise
+        """
+        if not executions:
+            return True
+
+        # The resource's client serializes plain Python values, like Table does
+        client = self.dynamodb.meta.client
+
+        try:
+            for start in range(0, len(executions), TRANSACT_WRITE_MAX_ITEMS):
+                chunk = executions[start : start + TRANSACT_WRITE_MAX_ITEMS]
+                client.transact_write_items(
+                    TransactItems=[
+                        {
+                            "Put": {
+                                "TableName": self.table_name,
+                                "Item": self._execution_to_item(execution),
+                            }
+                        }
+                        for execution in chunk
+                    ]
+                )
+            logger.info(f"Saved {len(executions)} executions to audit store (transactional)")
+            return True
+
+        except ClientError as e:
+            logger.error(f"Failed to save {len(executions)} executions: {e}", exc_info=True)
+            return False
+
     def get_execution(self, execution_id: str) -> ActionExecution | None:
         """Retrieve execution by ID.
 
@@ -128,36 +232,77 @@ class AuditStore:
             logger.error(f"Failed to query executions for policy {policy_id}: {e}")
             return []
 
+    def query_execution_statuses_by_policy(
+        self, policy_id: str, limit: int = 100
+    ) -> dict[str, str]:
+        """Query only the ID and status of a policy's executions.
+
+        Uses a projection so DynamoDB returns two attributes per item instead
+        of the full record, and skips building ActionExecution objects.
+
+        Args:
+            policy_id: Policy ID to query
+            limit: Maximum number of results (default: 100)
+
+        Returns:
+            Mapping of execution_id to status (ordered by executed_at descending)
+        """
+        try:
+            response = self.table.query(
+                IndexName="policy_id-executed_at-index",
+                KeyConditionExpression="policy_id = :pid",
+                ExpressionAttributeValues={":pid": policy_id},
+                ProjectionExpression="execution_id, #status",
+                ExpressionAttributeNames={"#status": "status"},
+                Limit=limit,
+                ScanIndexForward=False,  # Descending order (newest first)
+            )
+
+            return {item["execution_id"]: item["status"] for item in response.get("Items", [])}
+
+        except ClientError as e:
+            logger.error(f"Failed to query execution statuses for policy {policy_id}: {e}")
+            return {}
+
     def query_expired_executions(self, current_time: datetime) -> list[ActionExecution]:
         """Query executions that have expired TTL.
 
+        Queries the sparse status-ttl_expires_at-index, which only holds items
+        with a TTL, so the cost grows with the number of expired executions
+        rather than the table size. Tables created before that index existed
+        fall back to a filtered scan.
+
         Args:
             current_time: Current time to compare against TTL
 
         Returns:
             List of ActionExecution records with expired TTL
         """
-        try:
-            # Scan for executions with ttl_expires_at <= current_time
-            # and status = 'executed' (not yet rolled back)
-            current_time_str = current_time.isoformat()
-
-            response = self.table.scan(
-                FilterExpression=(
-                    "attribute_exists(ttl_expires_at) AND "
-                    "ttl_expires_at <= :current_time AND "
-                    "#status = :status"
-                ),
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={
-                    ":current_time": current_time_str,
-                    ":status": "executed",
-                },
-            )
+        # Only executions still in 'executed' status (not yet rolled back)
+        query_kwargs: dict[str, Any] = {
+            "IndexName": "status-ttl_expires_at-index",
+            "KeyConditionExpression": "#status = :status AND ttl_expires_at <= :current_time",
+            "ExpressionAttributeNames": {"#status": "status"},
+            "ExpressionAttributeValues": {
+                ":status": "executed",
+                ":current_time": current_time.isoformat(),
+            },
+        }
 
-            return [self._item_to_execution(item) for item in response.get("Items", [])]
+        try:
+            items = self._collect_pages(self.table.query, **query_kwargs)
+            return [self._item_to_execution(item) for item in items]
 
         except ClientError as e:
+            # DynamoDB reports a missing index as ValidationException (moto as
+            # ResourceNotFoundException); a missing table fails the scan too
+            if e.response["Error"]["Code"] in ("ValidationException", "ResourceNotFoundException"):
+                logger.warning(
+                    f"Cannot query status-ttl_expires_at-index on {self.table_name}, "
+                    f"falling back to scan: {e}"
+                )
+                return self._scan_expired_executions(current_time)
+
             logger.error(f"Failed to query expired executions: {e}")
             return []
 
@@ -202,6 +347,58 @@ class AuditStore:
     # Helpers
     # =========================================================================
 
+    @staticmethod
+    def _collect_pages(operation: Any, **kwargs: Any) -> list[dict[str, Any]]:
+        """Run a query or scan to completion, following LastEvaluatedKey.
+
+        Each response holds at most 1 MB of items, so a single call can miss
+        matches further into the table or index.
+
+        Args:
+            operation: Table method to call (e.g. self.table.query)
+            **kwargs: Request parameters
+
+        Returns:
+            Items from every page
+        """
+        items: list[dict[str, Any]] = []
+        while True:
+            response = operation(**kwargs)
+            items.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                return items
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def _scan_expired_executions(self, current_time: datetime) -> list[ActionExecution]:
+        """Find expired executions with a filtered scan (tables without the TTL index).
+
+        Args:
+            current_time: Current time to compare against TTL
+
+        Returns:
+            List of ActionExecution records with expired TTL
+        """
+        try:
+            items = self._collect_pages(
+                self.table.scan,
+                FilterExpression=(
+                    "attribute_exists(ttl_expires_at) AND "
+                    "ttl_expires_at <= :current_time AND "
+                    "#status = :status"
+                ),
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={
+                    ":current_time": current_time.isoformat(),
+                    ":status": "executed",
+                },
+            )
+
+            return [self._item_to_execution(item) for item in items]
+
+        except ClientError as e:
+            logger.error(f"Failed to scan expired executions: {e}")
+            return []
+
     def _execution_to_item(self, execution: ActionExecution) -> dict[str, Any]:
         """Convert ActionExecution to DynamoDB item.
 
@@ -296,6 +493,8 @@ def create_audit_table(
                 {"AttributeName": "execution_id", "AttributeType": "S"},
                 {"AttributeName": "policy_id", "AttributeType": "S"},
                 {"AttributeName": "executed_at", "AttributeType": "S"},
+                {"AttributeName": "status", "AttributeType": "S"},
+                {"AttributeName": "ttl_expires_at", "AttributeType": "S"},
             ],
             GlobalSecondaryIndexes=[
                 {
@@ -305,7 +504,16 @@ def create_audit_table(
                         {"AttributeName": "executed_at", "KeyType": "RANGE"},
                     ],
                     "Projection": {"ProjectionType": "ALL"},
-                }
+                },
+                {
+                    # Sparse: only items with a TTL are indexed (TTL cleanup)
+                    "IndexName": "status-ttl_expires_at-index",
+                    "KeySchema": [
+                        {"AttributeName": "status", "KeyType": "HASH"},
+                        {"AttributeName": "ttl_expires_at", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                },
             ],
             BillingMode="PAY_PER_REQUEST",
         )
@@ -12,21 +12,27 @@ Safety Features:
 - Audit trail (executed_by tracking)
 """
 
+import base64
 import hashlib
 import hmac
 import json
 import logging
 import os
-from datetime import datetime, timedelta
+import re
+import time
 from typing import Any
 
 from ..audit_store import AuditStore
 from ..executor_iam import IAMExecutor
-from ..notifier_slack import SlackNotifier
+from ..notifier_slack import SlackNotifier, get_http_session
 
 
 logger = logging.getLogger(__name__)
 
+# Characters that need no percent-encoding in a query value; execution IDs
+# are "exec-<uuid4>", so approval URLs are built without urlencode
+_URL_SAFE_ID = re.compile(r"[A-Za-z0-9_-]+")
+
 
 class ApprovalWebhookHandler:
     """Handle Slack approval webhook requests."""
@@ -50,11 +56,18 @@ class ApprovalWebhookHandler:
         """
         self.audit_store = audit_store or AuditStore()
         self.executor = executor or IAMExecutor()
-        self.notifier = notifier or SlackNotifier(webhook_url=os.getenv("SLACK_WEBHOOK_URL", ""))
+        self.notifier = notifier or SlackNotifier(
+            webhook_url=os.getenv("SLACK_WEBHOOK_URL", ""), session=get_http_session()
+        )
         self.approval_secret = approval_secret or os.getenv(
             "APPROVAL_SECRET", "default-secret-CHANGE-ME"
         )
         self.approval_timeout_hours = approval_timeout_hours
+        self._timeout_seconds = approval_timeout_hours * 3600
+
+        # Keyed HMAC state, derived once from the secret; each signature copies
+        # it instead of redoing the key schedule
+        self._hmac_template = hmac.new(self.approval_secret.encode(), digestmod=hashlib.sha256)
 
     def handle_approval(
         self, execution_id: str, signature: str, timestamp: str, user: str = "unknown"
@@ -64,7 +77,7 @@ class ApprovalWebhookHandler:
         Args:
             execution_id: Execution ID to approve
             signature: HMAC signature for verification
-            timestamp: Request timestamp (ISO8601)
+            timestamp: Request timestamp (Unix epoch seconds)
             user: User who approved (from Slack payload)
 
         Returns:
@@ -192,8 +205,14 @@ class ApprovalWebhookHandler:
 
         Returns:
             Dict with 'url', 'signature', and 'timestamp'
+
+        Raises:
+            ValueError: If execution_id contains characters that are not URL-safe
         """
-        timestamp = datetime.utcnow().isoformat()
+        if not _URL_SAFE_ID.fullmatch(execution_id):
+            raise ValueError(f"Execution ID is not URL-safe: {execution_id!r}")
+
+        timestamp = str(int(time.time()))
         signature = self._generate_signature(execution_id, timestamp)
 
         url = f"{base_url}/approve?id={execution_id}&sig={signature}&ts={timestamp}"
@@ -211,6 +230,8 @@ class ApprovalWebhookHandler:
         Returns:
             True if signature is valid
         """
+        # Compare the canonical encoding rather than decoding the request value,
+        # so only the exact string generate_approval_url issued is accepted
         expected_signature = self._generate_signature(execution_id, timestamp)
         return hmac.compare_digest(expected_signature, signature)
 
@@ -219,34 +240,27 @@ class ApprovalWebhookHandler:
 
         Args:
             execution_id: Execution ID
-            timestamp: Timestamp (ISO8601)
+            timestamp: Timestamp (Unix epoch seconds)
 
         Returns:
-            HMAC-SHA256 hex digest
+            Unpadded base64url encoding of the HMAC-SHA256 digest (43 chars)
         """
-        message = f"{execution_id}:{timestamp}"
-        signature = hmac.new(
-            self.approval_secret.encode(),
-            message.encode(),
-            hashlib.sha256,
-        ).hexdigest()
-        return signature
+        mac = self._hmac_template.copy()
+        mac.update(f"{execution_id}:{timestamp}".encode())
+        return base64.urlsafe_b64encode(mac.digest()).rstrip(b"=").decode()
 
     def _is_expired(self, timestamp: str) -> bool:
         """Check if timestamp is expired.
 
         Args:
-            timestamp: ISO8601 timestamp
+            timestamp: Unix epoch seconds, as emitted by generate_approval_url
 
         Returns:
             True if expired
         """
         try:
-            ts = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-            now = datetime.utcnow()
-            age = now - ts
-            return age > timedelta(hours=self.approval_timeout_hours)
-        except (ValueError, AttributeError) as e:
+            return time.time() - int(timestamp) > self._timeout_seconds
+        except (ValueError, TypeError) as e:
             logger.error(f"Invalid timestamp format: {timestamp} - {e}")
             return True  # Treat invalid timestamps as expired
 
@@ -279,10 +293,11 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
 
         # Extract user from Slack payload (if available)
         user = "unknown"
+        # API Gateway may hand over an already-decoded body; only parse strings
         body = event.get("body", "")
         if body:
             try:
-                payload = json.loads(body)
+                payload = body if isinstance(body, dict) else json.loads(body)
                 user = payload.get("user", {}).get("name", "unknown")
             except (json.JSONDecodeError, AttributeError):
                 pass
@@ -12,13 +12,35 @@ from typing import Any
 from uuid import uuid4
 
 from ..models import CostEvent
-from ..notifier_slack import SlackNotifier, get_cost_management_console_url
-from ..policy_engine import PolicyEngine, load_policies_from_directory
+from ..notifier_slack import SlackNotifier, get_cost_management_console_url, get_http_session
+from ..policy_engine import PolicyEngine, PolicyIndex, load_policies_from_directory
 
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
+# Policy indexes by POLICIES_PATH, kept for the life of the container. Policy
+# files ship with the deployment package, so warm invocations reuse the index
+# instead of re-reading and re-sorting every policy.
+_policy_indexes: dict[str, PolicyIndex] = {}
+
+
+def get_policy_index(policies_path: str) -> PolicyIndex:
+    """Load and index the policies under a path, once per container.
+
+    Args:
+        policies_path: Directory containing policy YAML/JSON files
+
+    Returns:
+        PolicyIndex over the enabled policies in that directory
+    """
+    index = _policy_indexes.get(policies_path)
+    if index is None:
+        policies = load_policies_from_directory(policies_path)
+        logger.info(f"Loaded {len(policies)} policies from {policies_path}")
+        index = _policy_indexes[policies_path] = PolicyIndex(policies)
+    return index
+
 
 def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     """Lambda handler for AWS Budget notifications.
@@ -42,18 +64,18 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
         cost_event = parse_event(event)
         logger.info(f"Parsed cost event: {cost_event.event_id}")
 
-        # Load policies
+        # Load policies (cached across warm invocations)
         policies_path = os.getenv("POLICIES_PATH", "/var/task/policies")
-        policies = load_policies_from_directory(policies_path)
-        logger.info(f"Loaded {len(policies)} policies from {policies_path}")
+        policy_index = get_policy_index(policies_path)
 
-        if not policies:
+        if not policy_index:
             logger.warning("No policies loaded, nothing to evaluate")
             return {"statusCode": 200, "body": "no_policies"}
 
-        # Evaluate event against policies
+        # Evaluate event against the policies that can match its source and amount
+        candidates = policy_index.candidates(cost_event)
         engine = PolicyEngine()
-        action_plan = engine.evaluate(cost_event, policies)
+        action_plan = engine.evaluate(cost_event, candidates)
 
         if not action_plan.matched:
             logger.info("No policy matched this cost event")
@@ -90,7 +112,7 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
         try:
             slack_webhook = os.getenv("SLACK_WEBHOOK_URL")
             if slack_webhook and "cost_event" in locals():
-                notifier = SlackNotifier(slack_webhook)
+                notifier = SlackNotifier(slack_webhook, session=get_http_session())
                 notifier.send_error_alert(cost_event, str(e))
         except Exception as notify_error:
             logger.error(f"Failed to send error notification: {notify_error}")
@@ -273,6 +295,31 @@ def extract_account_id(notification: dict[str, Any]) -> str:
     raise ValueError("Could not extract account ID from notification")
 
 
+def save_executions(audit_store: Any, executions: list[Any]) -> list[str]:
+    """Save execution records, one at a time if the batch write fails.
+
+    A failed batch may have written some records already; put_item overwrites
+    by execution_id, so retrying each record is safe and keeps one bad record
+    from dropping the rest.
+
+    Args:
+        audit_store: AuditStore to write to
+        executions: ActionExecutions to save
+
+    Returns:
+        IDs of the executions that could not be saved
+    """
+    if audit_store.save_executions_batch(executions):
+        return []
+
+    logger.error(f"Batch save of {len(executions)} executions failed, saving one at a time")
+    return [
+        execution.execution_id
+        for execution in executions
+        if not audit_store.save_execution(execution)
+    ]
+
+
 def execute_action_plan(cost_event: CostEvent, action_plan: Any) -> dict[str, Any]:
     """Execute action plan based on mode.
 
@@ -290,7 +337,7 @@ def execute_action_plan(cost_event: CostEvent, action_plan: Any) -> dict[str, An
     if not slack_webhook:
         raise ValueError("SLACK_WEBHOOK_URL environment variable required")
 
-    notifier = SlackNotifier(slack_webhook)
+    notifier = SlackNotifier(slack_webhook, session=get_http_session())
     console_url = get_cost_management_console_url(cost_event.account_id)
 
     if action_plan.mode == "dry_run":
@@ -326,7 +373,9 @@ def execute_action_plan(cost_event: CostEvent, action_plan: Any) -> dict[str, An
         # Save all executions to DynamoDB with status=planned
         for execution in executions:
             execution.status = "planned"  # Override dry-run status
-            audit_store.save_execution(execution)
+        unsaved = save_executions(audit_store, executions)
+        if unsaved:
+            logger.error(f"Manual mode: no audit record for {unsaved}; they cannot be approved")
 
         # Use first execution for approval notification
         primary_execution = executions[0]
@@ -379,8 +428,14 @@ def execute_action_plan(cost_event: CostEvent, action_plan: Any) -> dict[str, An
             }
 
         # Save all executions to DynamoDB
-        for execution in executions:
-            audit_store.save_execution(execution)
+        unsaved = save_executions(audit_store, executions)
+        if unsaved:
+            # The deny policies are already attached; without a record TTL
+            # cleanup will never roll them back
+            logger.critical(
+                f"Auto mode: guardrails applied without audit records for {unsaved}; "
+                "they must be rolled back manually"
+            )
 
         # Use first execution for notification
         primary_execution = executions[0]
@@ -21,7 +21,7 @@ from typing import Any
 from ..audit_store import AuditStore
 from ..executor_iam import IAMExecutor
 from ..models import ActionExecution
-from ..notifier_slack import SlackNotifier
+from ..notifier_slack import SlackNotifier, get_http_session
 
 
 logger = logging.getLogger(__name__)
@@ -47,7 +47,9 @@ class TTLCleanupHandler:
         """
         self.audit_store = audit_store or AuditStore()
         self.executor = executor or IAMExecutor()
-        self.notifier = notifier or SlackNotifier(webhook_url=os.getenv("SLACK_WEBHOOK_URL", ""))
+        self.notifier = notifier or SlackNotifier(
+            webhook_url=os.getenv("SLACK_WEBHOOK_URL", ""), session=get_http_session()
+        )
         self.batch_size = batch_size
 
     def cleanup_expired_executions(self) -> dict[str, Any]:
@@ -8,7 +8,7 @@ These models are shared across all components (policy engine, executor, notifier
 from datetime import datetime
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
 
 # ============================================================================
@@ -96,7 +96,13 @@ class PolicyExceptions(BaseModel):
 
 
 class PolicyMatch(BaseModel):
-    """Match conditions for cost events."""
+    """Match conditions for cost events.
+
+    ``prefilter`` checks the source and account conditions against frozensets
+    that are cached together with the field values they were built from, so
+    they are rebuilt whenever those values change, however they were changed
+    (assignment, in-place edits or model_copy).
+    """
 
     source: list[str] = Field(..., description="Event sources: budgets, anomaly")
     account_ids: list[str] = Field(..., description="AWS account IDs to match")
@@ -107,6 +113,11 @@ class PolicyMatch(BaseModel):
     )
     regions: list[str] | None = Field(default=None, description="AWS regions (e.g., 'us-east-1')")
 
+    # ((source, account_ids) as tuples, source set, account set)
+    _lookup: (
+        tuple[tuple[tuple[str, ...], tuple[str, ...]], frozenset[str], frozenset[str]] | None
+    ) = PrivateAttr(default=None)
+
     @field_validator("account_ids")
     @classmethod
     def validate_account_ids(cls, v: list[str]) -> list[str]:
@@ -131,6 +142,30 @@ class PolicyMatch(BaseModel):
         if self.max_amount_usd is not None and self.max_amount_usd <= self.min_amount_usd:
             raise ValueError("max_amount_usd must be greater than min_amount_usd")
 
+    def _lookup_sets(self) -> tuple[frozenset[str], frozenset[str]]:
+        """Get the source and account sets, rebuilding them if the fields changed."""
+        key = (tuple(self.source), tuple(self.account_ids))
+        lookup = self._lookup
+        if lookup is None or lookup[0] != key:
+            lookup = self._lookup = (key, frozenset(key[0]), frozenset(key[1]))
+        return lookup[1], lookup[2]
+
+    def prefilter(self, event: CostEvent) -> bool:
+        """Check the source, account ID and minimum amount conditions.
+
+        Args:
+            event: The cost event
+
+        Returns:
+            True if the event passes all three conditions
+        """
+        sources, accounts = self._lookup_sets()
+        return (
+            event.source in sources
+            and event.account_id in accounts
+            and event.amount >= self.min_amount_usd
+        )
+
 
 class Principal(BaseModel):
     """IAM principal (role or user)."""
@@ -5,26 +5,99 @@ Supports dry-run alerts, approval requests, and execution confirmations.
 """
 
 import logging
+from types import ModuleType
 from typing import Any
 from urllib.parse import urlencode
 
-import requests
-
 from .models import ActionExecution, ActionPlan, CostEvent
 
 
 logger = logging.getLogger(__name__)
 
+# Block Kit headers never vary per event, so build them once per container and
+# share them across payloads. They are only ever serialized, never mutated.
+_DRY_RUN_HEADER: dict[str, Any] = {
+    "type": "header",
+    "text": {"type": "plain_text", "text": "🚨 Cost Alert (Dry-Run)"},
+}
+_APPROVAL_HEADER: dict[str, Any] = {
+    "type": "header",
+    "text": {"type": "plain_text", "text": "⚠️ Cost Alert - Approval Required"},
+}
+_EXECUTION_HEADER: dict[str, Any] = {
+    "type": "header",
+    "text": {"type": "plain_text", "text": "✅ Guardrail Applied"},
+}
+_ROLLBACK_HEADER: dict[str, Any] = {
+    "type": "header",
+    "text": {"type": "plain_text", "text": "🔄 Guardrail Rolled Back"},
+}
+_ERROR_HEADER: dict[str, Any] = {
+    "type": "header",
+    "text": {"type": "plain_text", "text": "❌ Guardrail Error"},
+}
+
+
+def _requests() -> ModuleType:
+    """Import requests on first use.
+
+    The one deferred import in this module: every Lambda handler imports it,
+    and only paths that actually notify need requests/urllib3 (see
+    TestColdStartImports). Everything else is imported at module level.
+
+    Returns:
+        The requests module
+    """
+    import requests
+
+    return requests
+
+
+# Container-wide HTTP session for Slack posts, created by get_http_session()
+_http_session: Any | None = None
+
+
+def get_http_session() -> Any:
+    """Get the shared requests.Session for Slack posts, creating it on first use.
+
+    Handlers pass it to SlackNotifier so warm invocations reuse the open TLS
+    connection to hooks.slack.com. It is created lazily so that importing
+    the handlers still doesn't import requests on cold start.
+
+    Returns:
+        requests.Session shared by every notifier in the container
+    """
+    global _http_session
+    if _http_session is None:
+        _http_session = _requests().Session()
+    return _http_session
+
+
+def _event_section(event: CostEvent) -> dict[str, Any]:
+    """Build the Account/Amount/Source/Period section shared by cost alerts."""
+    return {
+        "type": "section",
+        "fields": [
+            {"type": "mrkdwn", "text": f"*Account:* `{event.account_id}`"},
+            {"type": "mrkdwn", "text": f"*Amount:* ${event.amount:.2f}"},
+            {"type": "mrkdwn", "text": f"*Source:* {event.source}"},
+            {"type": "mrkdwn", "text": f"*Period:* {event.time_window}"},
+        ],
+    }
+
 
 class SlackNotifier:
     """Send notifications to Slack via Incoming Webhook."""
 
-    def __init__(self, webhook_url: str, timeout: int = 10):
+    def __init__(self, webhook_url: str, timeout: int = 10, session: Any | None = None):
         """Initialize Slack Notifier.
 
         Args:
             webhook_url: Slack Incoming Webhook URL
             timeout: HTTP request timeout in seconds (default: 10)
+            session: Optional HTTP session with a requests-compatible ``post``
+                (e.g. get_http_session()) to send through instead of the
+                module-level requests.post
 
         Raises:
             ValueError: If webhook_url is empty or invalid
@@ -34,6 +107,7 @@ class SlackNotifier:
 
         self.webhook_url = webhook_url.strip()
         self.timeout = timeout
+        self.session = session
 
     def send_dry_run_alert(
         self, event: CostEvent, plan: ActionPlan, console_url: str | None = None
@@ -125,21 +199,7 @@ class SlackNotifier:
         self, event: CostEvent, plan: ActionPlan, console_url: str | None
     ) -> dict[str, Any]:
         """Build Slack Block Kit payload for dry-run notification."""
-        blocks: list[dict[str, Any]] = [
-            {
-                "type": "header",
-                "text": {"type": "plain_text", "text": "🚨 Cost Alert (Dry-Run)"},
-            },
-            {
-                "type": "section",
-                "fields": [
-                    {"type": "mrkdwn", "text": f"*Account:* `{event.account_id}`"},
-                    {"type": "mrkdwn", "text": f"*Amount:* ${event.amount:.2f}"},
-                    {"type": "mrkdwn", "text": f"*Source:* {event.source}"},
-                    {"type": "mrkdwn", "text": f"*Period:* {event.time_window}"},
-                ],
-            },
-        ]
+        blocks: list[dict[str, Any]] = [_DRY_RUN_HEADER, _event_section(event)]
 
         if plan.matched_policy_id:
             blocks.append(
@@ -216,24 +276,7 @@ class SlackNotifier:
         reject_url: str | None,
     ) -> dict[str, Any]:
         """Build Slack Block Kit payload for approval request."""
-        blocks: list[dict[str, Any]] = [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": "⚠️ Cost Alert - Approval Required",
-                },
-            },
-            {
-                "type": "section",
-                "fields": [
-                    {"type": "mrkdwn", "text": f"*Account:* `{event.account_id}`"},
-                    {"type": "mrkdwn", "text": f"*Amount:* ${event.amount:.2f}"},
-                    {"type": "mrkdwn", "text": f"*Source:* {event.source}"},
-                    {"type": "mrkdwn", "text": f"*Period:* {event.time_window}"},
-                ],
-            },
-        ]
+        blocks: list[dict[str, Any]] = [_APPROVAL_HEADER, _event_section(event)]
 
         if plan.matched_policy_id:
             blocks.append(
@@ -326,10 +369,7 @@ class SlackNotifier:
     ) -> dict[str, Any]:
         """Build Slack Block Kit payload for execution confirmation."""
         blocks: list[dict[str, Any]] = [
-            {
-                "type": "header",
-                "text": {"type": "plain_text", "text": "✅ Guardrail Applied"},
-            },
+            _EXECUTION_HEADER,
             {
                 "type": "section",
                 "fields": [
@@ -392,10 +432,7 @@ class SlackNotifier:
     def _build_rollback_payload(self, execution: ActionExecution) -> dict[str, Any]:
         """Build Slack Block Kit payload for rollback confirmation."""
         blocks: list[dict[str, Any]] = [
-            {
-                "type": "header",
-                "text": {"type": "plain_text", "text": "🔄 Guardrail Rolled Back"},
-            },
+            _ROLLBACK_HEADER,
             {
                 "type": "section",
                 "fields": [
@@ -429,10 +466,7 @@ class SlackNotifier:
     ) -> dict[str, Any]:
         """Build Slack Block Kit payload for error notification."""
         blocks: list[dict[str, Any]] = [
-            {
-                "type": "header",
-                "text": {"type": "plain_text", "text": "❌ Guardrail Error"},
-            },
+            _ERROR_HEADER,
             {
                 "type": "section",
                 "fields": [
@@ -489,8 +523,11 @@ class SlackNotifier:
         Returns:
             True if sent successfully (HTTP 200), False otherwise
         """
+        requests = _requests()
+        post = self.session.post if self.session is not None else requests.post
+
         try:
-            response = requests.post(
+            response = post(
                 self.webhook_url,
                 json=payload,
                 headers={"Content-Type": "application/json"},
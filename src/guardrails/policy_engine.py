@@ -5,11 +5,14 @@ Evaluates cost events against policies to determine what actions to take.
 This is a pure, stateless, testable module - no side effects.
 """
 
+import json
 import logging
+import sys
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-
-import yaml
+from types import ModuleType
 
 from src.guardrails.models import (
     ActionPlan,
@@ -22,6 +25,13 @@ from src.guardrails.models import (
 
 logger = logging.getLogger(__name__)
 
+# Directories with at least this many policy files are read with a thread pool
+PARALLEL_READ_MIN_FILES = 8
+MAX_READ_WORKERS = 8
+
+# Policy files picked up by load_policies_from_directory when no pattern is given
+POLICY_FILE_PATTERNS = ("*.yaml", "*.json")
+
 
 class PolicyEngine:
     """
@@ -71,21 +81,10 @@ class PolicyEngine:
         Returns:
             True if event matches all policy conditions, False otherwise
         """
-        # Check source
-        if event.source not in policy.match.source:
-            logger.debug(f"Source mismatch: {event.source} not in {policy.match.source}")
-            return False
-
-        # Check account ID
-        if event.account_id not in policy.match.account_ids:
-            logger.debug(
-                f"Account ID mismatch: {event.account_id} not in {policy.match.account_ids}"
-            )
-            return False
-
-        # Check minimum amount
-        if event.amount < policy.match.min_amount_usd:
-            logger.debug(f"Amount below threshold: {event.amount} < {policy.match.min_amount_usd}")
+        # Check source, account ID and minimum amount (precompiled set lookups)
+        if not policy.match.prefilter(event):
+            if logger.isEnabledFor(logging.DEBUG):
+                self._log_prefilter_mismatch(event, policy)
             return False
 
         # Check maximum amount (if set)
@@ -117,6 +116,17 @@ class PolicyEngine:
 
         return True
 
+    def _log_prefilter_mismatch(self, event: CostEvent, policy: GuardrailPolicy) -> None:
+        """Log which of the prefilter conditions rejected the event."""
+        if event.source not in policy.match.source:
+            logger.debug(f"Source mismatch: {event.source} not in {policy.match.source}")
+        elif event.account_id not in policy.match.account_ids:
+            logger.debug(
+                f"Account ID mismatch: {event.account_id} not in {policy.match.account_ids}"
+            )
+        else:
+            logger.debug(f"Amount below threshold: {event.amount} < {policy.match.min_amount_usd}")
+
     def _is_exempted(self, event: CostEvent, exceptions: PolicyExceptions) -> bool:
         """
         Check if event is exempted by exception rules.
@@ -231,17 +241,90 @@ class PolicyEngine:
         )
 
 
+class PolicyIndex:
+    """
+    Index of policies by event source, sorted by minimum amount.
+
+    Narrows a policy list to the candidates that can possibly match an event
+    (same source, min_amount_usd <= amount) with a binary search, instead of
+    running every policy through PolicyEngine.match_event().
+
+    Candidates are returned in their original list order, so "first matching
+    policy wins" semantics (file name order when loaded from a directory)
+    are preserved.
+    """
+
+    def __init__(self, policies: list[GuardrailPolicy]):
+        """
+        Build the index.
+
+        Args:
+            policies: Policies in priority order (e.g., from load_policies_from_directory)
+        """
+        self._size = len(policies)
+        self._thresholds: dict[str, list[float]] = {}
+        self._entries: dict[str, list[tuple[int, GuardrailPolicy]]] = {}
+
+        groups: dict[str, list[tuple[float, int, GuardrailPolicy]]] = {}
+        for position, policy in enumerate(policies):
+            threshold = float(policy.match.min_amount_usd)
+            for source in set(policy.match.source):
+                groups.setdefault(source, []).append((threshold, position, policy))
+
+        for source, entries in groups.items():
+            # Stable secondary sort on position keeps equal thresholds in priority order
+            entries.sort(key=lambda entry: (entry[0], entry[1]))
+            self._thresholds[source] = [threshold for threshold, _, _ in entries]
+            self._entries[source] = [(position, policy) for _, position, policy in entries]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def candidates(self, event: CostEvent) -> list[GuardrailPolicy]:
+        """
+        Get the policies whose source and minimum amount admit the event.
+
+        Args:
+            event: The cost event
+
+        Returns:
+            Candidate policies in original priority order
+        """
+        thresholds = self._thresholds.get(event.source)
+        if not thresholds:
+            return []
+
+        end = bisect_right(thresholds, event.amount)
+        return [policy for _, policy in sorted(self._entries[event.source][:end])]
+
+
 # ============================================================================
 # Policy Loading Utilities
 # ============================================================================
 
 
+def _yaml() -> ModuleType:
+    """
+    Import PyYAML on first use.
+
+    The one deferred import in this module: the Budgets handler imports it on
+    every cold start, and only YAML policy files need PyYAML (see
+    TestColdStartImports). Everything else is imported at module level.
+
+    Returns:
+        The yaml module
+    """
+    import yaml
+
+    return yaml
+
+
 def load_policy_from_file(file_path: str | Path) -> GuardrailPolicy:
     """
-    Load a single policy from a YAML file.
+    Load a single policy from a YAML or JSON file.
 
     Args:
-        file_path: Path to YAML file
+        file_path: Path to policy file (.json files are parsed as JSON, others as YAML)
 
     Returns:
         GuardrailPolicy instance
@@ -249,6 +332,7 @@ def load_policy_from_file(file_path: str | Path) -> GuardrailPolicy:
     Raises:
         FileNotFoundError: If file doesn't exist
         yaml.YAMLError: If YAML is invalid
+        json.JSONDecodeError: If JSON is invalid
         pydantic.ValidationError: If policy validation fails
     """
     file_path = Path(file_path)
@@ -258,24 +342,100 @@ def load_policy_from_file(file_path: str | Path) -> GuardrailPolicy:
 
     logger.info(f"Loading policy from {file_path}")
 
-    with open(file_path, encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+    return _parse_policy(file_path.read_text(encoding="utf-8"), file_path.suffix)
+
+
+def _parse_policy(content: str, suffix: str = ".yaml") -> GuardrailPolicy:
+    """
+    Parse and validate policy content.
+
+    JSON policies skip PyYAML entirely; json.loads is considerably faster than
+    even the libyaml-backed YAML loader.
+
+    Args:
+        content: Policy document text
+        suffix: File suffix; ".json" selects the JSON parser, anything else YAML
 
-    policy = GuardrailPolicy(**data)
+    Returns:
+        GuardrailPolicy instance
+    """
+    if suffix == ".json":
+        data = json.loads(content)
+    else:
+        yaml = _yaml()
+        # Prefer the libyaml-backed loader when PyYAML was built with it
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        data = yaml.load(content, Loader=loader)  # noqa: S506 - always a safe loader
+
+    policy = GuardrailPolicy.model_validate(data)
+    _intern_policy_strings(policy)
     logger.info(f"Loaded policy: {policy.policy_id} (mode={policy.mode})")
 
     return policy
 
 
+def _intern_policy_strings(policy: GuardrailPolicy) -> None:
+    """
+    Intern identifiers that repeat across policies.
+
+    Sources, account IDs, principal ARNs and deny actions are shared by many
+    policy files; interning lets every loaded policy reference one copy and
+    makes equal strings identical, so set/dict lookups hit on identity.
+    This runs before the policy is first evaluated, so the lookup sets that
+    PolicyMatch.prefilter builds hold the interned values.
+
+    Args:
+        policy: Freshly validated policy
+    """
+    policy.policy_id = sys.intern(policy.policy_id)
+    policy.match.source = [sys.intern(s) for s in policy.match.source]
+    policy.match.account_ids = [sys.intern(a) for a in policy.match.account_ids]
+
+    for principal in policy.scope.principals:
+        principal.arn = sys.intern(principal.arn)
+
+    for action in policy.actions:
+        if action.deny:
+            action.deny = [sys.intern(d) for d in action.deny]
+
+
+def _read_policy_files(file_paths: list[Path]) -> list[str | OSError]:
+    """
+    Read policy files, concurrently once there are enough of them to benefit.
+
+    File reads release the GIL, so on slow or network-backed storage (e.g., EFS)
+    the reads overlap instead of paying one round-trip per file. Results are
+    returned in input order; a failed read is returned as its OSError.
+
+    Args:
+        file_paths: Policy files to read
+
+    Returns:
+        File contents (or the read error) for each path
+    """
+
+    def read(file_path: Path) -> str | OSError:
+        try:
+            return file_path.read_text(encoding="utf-8")
+        except OSError as e:
+            return e
+
+    if len(file_paths) < PARALLEL_READ_MIN_FILES:
+        return [read(file_path) for file_path in file_paths]
+
+    with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(file_paths))) as pool:
+        return list(pool.map(read, file_paths))
+
+
 def load_policies_from_directory(
-    directory: str | Path, pattern: str = "*.yaml"
+    directory: str | Path, pattern: str | None = None
 ) -> list[GuardrailPolicy]:
     """
     Load all policies from a directory.
 
     Args:
-        directory: Path to directory containing policy YAML files
-        pattern: Glob pattern for policy files (default: *.yaml)
+        directory: Path to directory containing policy YAML/JSON files
+        pattern: Glob pattern for policy files (default: *.yaml and *.json)
 
     Returns:
         List of GuardrailPolicy instances (only enabled policies)
@@ -292,13 +452,17 @@ def load_policies_from_directory(
         raise ValueError(f"Path is not a directory: {directory}")
 
     policies = []
-    policy_files = sorted(directory.glob(pattern))
+    patterns = (pattern,) if pattern else POLICY_FILE_PATTERNS
+    policy_files = sorted({path for glob in patterns for path in directory.glob(glob)})
 
     logger.info(f"Found {len(policy_files)} policy files in {directory}")
 
-    for file_path in policy_files:
+    for file_path, content in zip(policy_files, _read_policy_files(policy_files), strict=True):
         try:
-            policy = load_policy_from_file(file_path)
+            if isinstance(content, OSError):
+                raise content
+            logger.info(f"Loading policy from {file_path}")
+            policy = _parse_policy(content, file_path.suffix)
             if policy.enabled:
                 policies.append(policy)
                 logger.info(f"Loaded enabled policy: {policy.policy_id}")
@@ -325,6 +489,8 @@ def validate_policy_file(file_path: str | Path) -> tuple[bool, str | None]:
     Returns:
         Tuple of (is_valid: bool, error_message: Optional[str])
     """
+    yaml = _yaml()
+
     try:
         load_policy_from_file(file_path)
         return True, None
@@ -332,5 +498,7 @@ def validate_policy_file(file_path: str | Path) -> tuple[bool, str | None]:
         return False, f"File not found: {e}"
     except yaml.YAMLError as e:
         return False, f"YAML syntax error: {e}"
+    except json.JSONDecodeError as e:
+        return False, f"JSON syntax error: {e}"
     except Exception as e:
         return False, f"Validation error: {e}"
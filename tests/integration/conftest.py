@@ -0,0 +1,27 @@
+"""Shared fixtures for the end-to-end integration tests."""
+
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _fresh_policy_indexes(monkeypatch):
+    """Give each test an empty Budgets handler policy-index cache.
+
+    The handler caches one index per POLICIES_PATH for the life of the
+    process, so without this a test would reuse whatever policies an earlier
+    test loaded (or stubbed) under the same path.
+    """
+    monkeypatch.setattr("src.guardrails.handlers.budgets_event._policy_indexes", {})
+
+
+@pytest.fixture(scope="session")
+def lambda_context():
+    """Stand-in Lambda context; the handlers only pass it through."""
+    return SimpleNamespace(
+        aws_request_id="test",
+        function_name="test",
+        invoked_function_arn="arn:aws:lambda:us-east-1:123456789012:function:test",
+        get_remaining_time_in_millis=lambda: 30000,
+    )
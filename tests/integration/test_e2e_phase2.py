@@ -16,657 +16,422 @@ work together correctly for the manual approval workflow.
 """
 
 import json
-import os
-import tempfile
-from datetime import datetime, timedelta
-from pathlib import Path
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import patch
 
+import boto3
 import pytest
 from moto import mock_aws
 
+from src.guardrails.audit_store import AuditStore
 from src.guardrails.handlers.approval_webhook import ApprovalWebhookHandler
 from src.guardrails.handlers.budgets_event import lambda_handler
+from src.guardrails.models import GuardrailPolicy
 
 
-@pytest.fixture
-def temp_policies_dir():
-    """Create temporary directory with manual approval policy."""
-    import yaml
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        policies_path = Path(tmpdir)
-
-        # Create manual approval policy
-        manual_policy = {
-            "policy_id": "test-manual-ec2-spike",
-            "enabled": True,
-            "mode": "manual",
-            "ttl_minutes": 180,
-            "match": {
-                "source": ["budgets"],
-                "account_ids": ["123456789012"],
-                "min_amount_usd": 500.0,
-            },
-            "scope": {
-                "principals": [
-                    {
-                        "type": "iam_role",
-                        "arn": "arn:aws:iam::123456789012:role/ci-deployer",
-                    }
-                ]
-            },
-            "actions": [
-                {
-                    "type": "attach_deny_policy",
-                    "deny": ["ec2:RunInstances", "ec2:CreateNatGateway"],
-                }
+# Serialized once; every test's role uses the same trust policy.
+_ASSUME_ROLE_POLICY = json.dumps(
+    {
+        "Version": "2012-10-17",
+        "Statement": [
+            {
+                "Effect": "Allow",
+                "Principal": {"Service": "ec2.amazonaws.com"},
+                "Action": "sts:AssumeRole",
+            }
+        ],
+    }
+)
+
+_AUDIT_TABLE_SCHEMA = {
+    "TableName": "autoguardrails-audit",
+    "KeySchema": [{"AttributeName": "execution_id", "KeyType": "HASH"}],
+    "AttributeDefinitions": [
+        {"AttributeName": "execution_id", "AttributeType": "S"},
+        {"AttributeName": "policy_id", "AttributeType": "S"},
+        {"AttributeName": "executed_at", "AttributeType": "S"},
+    ],
+    "GlobalSecondaryIndexes": [
+        {
+            "IndexName": "policy_id-executed_at-index",
+            "KeySchema": [
+                {"AttributeName": "policy_id", "KeyType": "HASH"},
+                {"AttributeName": "executed_at", "KeyType": "RANGE"},
             ],
-            "notify": {"slack_webhook_ssm_param": "/test/webhook"},
+            "Projection": {"ProjectionType": "ALL"},
         }
+    ],
+    "BillingMode": "PAY_PER_REQUEST",
+}
+
+
+# SNS-wrapped budget notification matching the manual policy. The handler
+# never mutates its event, so tests share this dict as-is.
+_SNS_MESSAGE_JSON = json.dumps(
+    {
+        "budgetName": "monthly-budget",
+        "notificationType": "ACTUAL",
+        "thresholdType": "PERCENTAGE",
+        "threshold": 90,
+        "calculatedSpend": {"actualSpend": {"amount": 600.0, "unit": "USD"}},
+        "notificationArn": "arn:aws:budgets::123456789012:budget/monthly",
+        "time": "2024-01-15T10:30:00Z",
+    }
+)
+
+# Fixed approval-link timestamp that is always older than the approval window
+_EXPIRED_TIMESTAMP = "1705312800"  # 2024-01-15T10:00:00Z
+
+# SlackNotifier only calls raise_for_status(), so a plain namespace stands in
+# for requests.Response without building a MagicMock per call.
+_OK_RESPONSE = SimpleNamespace(status_code=200, raise_for_status=lambda: None)
+
+_BUDGET_EVENT = {"Records": [{"EventSource": "aws:sns", "Sns": {"Message": _SNS_MESSAGE_JSON}}]}
+
+
+def _find_payload(payloads: list[dict], header_text: str) -> dict | None:
+    """Return the first Slack payload whose header contains header_text."""
+    return next(
+        (
+            payload
+            for payload in payloads
+            if any(
+                block.get("type") == "header"
+                and header_text in block.get("text", {}).get("text", "")
+                for block in payload.get("blocks", [])
+            )
+        ),
+        None,
+    )
+
+
+def _has_button(payload: dict) -> bool:
+    """Return True if any actions block in the Slack payload holds a button."""
+    return any(
+        element.get("type") == "button"
+        for block in payload["blocks"]
+        if block.get("type") == "actions"
+        for element in block.get("elements", [])
+    )
+
+
+@pytest.fixture(scope="session")
+def aws_clients():
+    """Build the test-side boto3 clients once; moto intercepts them when active.
+
+    The fake credentials stay set until the session ends, so the clients
+    never resolve real ones.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("AWS_ACCESS_KEY_ID", "testing")
+        mp.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+        yield SimpleNamespace(
+            iam=boto3.client("iam", region_name="us-east-1"),
+            dynamodb=boto3.client("dynamodb", region_name="us-east-1"),
+        )
 
-        (policies_path / "manual-approval.yaml").write_text(yaml.dump(manual_policy))
 
-        yield str(policies_path)
+@pytest.fixture(scope="module")
+def aws_resources(aws_clients):
+    """Start moto and create the IAM role and audit table once per module.
 
+    Other modules start their own per-test mocks and expect empty backends,
+    so the mock is stopped when this module finishes rather than at session
+    end.
+    """
+    mock = mock_aws()
+    mock.start()
+    try:
+        aws_clients.iam.create_role(
+            RoleName="ci-deployer", AssumeRolePolicyDocument=_ASSUME_ROLE_POLICY
+        )
+        aws_clients.dynamodb.create_table(**_AUDIT_TABLE_SCHEMA)
 
-class TestE2EManualApprovalFlow:
-    """Test complete manual approval workflow."""
+        yield aws_clients
+    finally:
+        mock.stop()
 
-    @mock_aws
-    def test_manual_approval_end_to_end(self, temp_policies_dir):
-        """Test full manual approval flow from event to execution.
 
-        Flow:
-        1. Budget event triggers lambda
-        2. Policy matches (manual mode)
-        3. Execution saved to DynamoDB (status: planned)
-        4. Slack notification sent with approval button
-        5. User clicks approval
-        6. Approval webhook executes guardrail
-        7. IAM deny policy attached
-        8. Execution updated (status: executed)
-        9. Confirmation sent to Slack
-        """
-        import boto3
+@pytest.fixture(scope="module")
+def audit_store(aws_resources):
+    """AuditStore bound to the mocked audit table, shared by the module's tests."""
+    return AuditStore(table_name="autoguardrails-audit")
 
-        # Setup mocked AWS resources
-        iam = boto3.client("iam", region_name="us-east-1")
-        dynamodb = boto3.client("dynamodb", region_name="us-east-1")
 
-        # Create IAM role
-        iam.create_role(
-            RoleName="ci-deployer",
-            AssumeRolePolicyDocument=json.dumps(
-                {
-                    "Version": "2012-10-17",
-                    "Statement": [
-                        {
-                            "Effect": "Allow",
-                            "Principal": {"Service": "ec2.amazonaws.com"},
-                            "Action": "sts:AssumeRole",
-                        }
-                    ],
-                }
-            ),
+@pytest.fixture
+def aws(aws_resources):
+    """Shared AWS resources, reset to their initial state after each test."""
+    yield aws_resources
+
+    iam = aws_resources.iam
+    attached = iam.list_attached_role_policies(RoleName="ci-deployer")["AttachedPolicies"]
+    for policy in attached:
+        iam.detach_role_policy(RoleName="ci-deployer", PolicyArn=policy["PolicyArn"])
+        iam.delete_policy(PolicyArn=policy["PolicyArn"])
+
+    dynamodb = aws_resources.dynamodb
+    items = dynamodb.scan(TableName="autoguardrails-audit", ProjectionExpression="execution_id")
+    for item in items["Items"]:
+        dynamodb.delete_item(
+            TableName="autoguardrails-audit", Key={"execution_id": item["execution_id"]}
         )
 
-        # Create DynamoDB audit table
-        dynamodb.create_table(
-            TableName="autoguardrails-audit",
-            KeySchema=[{"AttributeName": "execution_id", "KeyType": "HASH"}],
-            AttributeDefinitions=[
-                {"AttributeName": "execution_id", "AttributeType": "S"},
-                {"AttributeName": "policy_id", "AttributeType": "S"},
-                {"AttributeName": "executed_at", "AttributeType": "S"},
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    "IndexName": "policy_id-executed_at-index",
-                    "KeySchema": [
-                        {"AttributeName": "policy_id", "KeyType": "HASH"},
-                        {"AttributeName": "executed_at", "KeyType": "RANGE"},
-                    ],
-                    "Projection": {"ProjectionType": "ALL"},
-                }
-            ],
-            BillingMode="PAY_PER_REQUEST",
-        )
 
-        # === Step 1-4: Budget event → Policy match → Slack notification ===
-        event = {
-            "Records": [
+_MANUAL_POLICY = GuardrailPolicy.model_validate(
+    {
+        "policy_id": "test-manual-ec2-spike",
+        "enabled": True,
+        "mode": "manual",
+        "ttl_minutes": 180,
+        "match": {
+            "source": ["budgets"],
+            "account_ids": ["123456789012"],
+            "min_amount_usd": 500.0,
+        },
+        "scope": {
+            "principals": [
                 {
-                    "EventSource": "aws:sns",
-                    "Sns": {
-                        "Message": json.dumps(
-                            {
-                                "budgetName": "monthly-budget",
-                                "notificationType": "ACTUAL",
-                                "thresholdType": "PERCENTAGE",
-                                "threshold": 90,
-                                "calculatedSpend": {
-                                    "actualSpend": {"amount": 600.0, "unit": "USD"}
-                                },
-                                "notificationArn": "arn:aws:budgets::123456789012:budget/monthly",
-                                "time": "2024-01-15T10:30:00Z",
-                            }
-                        )
-                    },
+                    "type": "iam_role",
+                    "arn": "arn:aws:iam::123456789012:role/ci-deployer",
                 }
             ]
-        }
+        },
+        "actions": [
+            {
+                "type": "attach_deny_policy",
+                "deny": ["ec2:RunInstances", "ec2:CreateNatGateway"],
+            }
+        ],
+        "notify": {"slack_webhook_ssm_param": "/test/webhook"},
+    }
+)
 
-        context = MagicMock()
 
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/test",
-                "POLICIES_PATH": temp_policies_dir,
-                "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
-                "AWS_DEFAULT_REGION": "us-east-1",
-            },
-        ):
-            with patch("requests.post") as mock_post:
-                mock_response = MagicMock()
-                mock_response.status_code = 200
-                mock_post.return_value = mock_response
-
-                # Execute budget event handler
-                response = lambda_handler(event, context)
-
-                # Verify Lambda response
-                assert response["statusCode"] == 200
-                body = json.loads(response["body"])
-                assert body["status"] == "success"
-                assert body["mode"] == "manual"
-                assert body["policy_id"] == "test-manual-ec2-spike"
-                assert "result" in body
-                assert "execution_id" in body["result"]
-
-                execution_id = body["result"]["execution_id"]
-
-                # Verify Slack notification sent
-                assert mock_post.call_count >= 1
-
-                # Find the approval request notification
-                approval_notification = None
-                for call in mock_post.call_args_list:
-                    payload = call[1]["json"]
-                    blocks = payload.get("blocks", [])
-                    for block in blocks:
-                        if block.get("type") == "header":
-                            if "Approval Required" in block.get("text", {}).get("text", ""):
-                                approval_notification = payload
-                                break
-
-                assert approval_notification is not None, "No approval request notification found"
-
-                # Verify approval button exists
-                has_button = False
-                for block in approval_notification["blocks"]:
-                    if block.get("type") == "actions":
-                        for element in block.get("elements", []):
-                            if element.get("type") == "button":
-                                has_button = True
-                                break
-
-                assert has_button, "No approval button found in notification"
-
-                # Verify execution saved to DynamoDB
-                from src.guardrails.audit_store import AuditStore
-
-                audit_store = AuditStore(table_name="autoguardrails-audit")
-                execution = audit_store.get_execution(execution_id)
-
-                assert execution is not None
-                assert execution.status == "planned"
-                assert execution.policy_id == "test-manual-ec2-spike"
-                assert execution.action == "attach_deny_policy"
+_BASE_ENV = {
+    "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/test",
+    "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
 
-        # === Step 5-9: User approval → Execution → Confirmation ===
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/test",
-                "APPROVAL_SECRET": "test-secret-key",
-                "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
-                "AWS_DEFAULT_REGION": "us-east-1",
-            },
-        ):
-            with patch("requests.post") as mock_post:
-                mock_response = MagicMock()
-                mock_response.status_code = 200
-                mock_post.return_value = mock_response
-
-                # Generate approval URL
-                handler = ApprovalWebhookHandler(approval_secret="test-secret-key")
-                approval_data = handler.generate_approval_url(
-                    execution_id=execution_id,
-                    base_url="https://api.example.com",
-                )
 
-                # Simulate user clicking approval button
-                approval_response = handler.handle_approval(
-                    execution_id=execution_id,
-                    signature=approval_data["signature"],
-                    timestamp=approval_data["timestamp"],
-                    user="alice",
-                )
+@pytest.fixture(autouse=True)
+def _env(monkeypatch):
+    """Set the environment shared by the budget and approval handlers."""
+    for key, value in _BASE_ENV.items():
+        monkeypatch.setenv(key, value)
 
-                # Verify approval succeeded
-                assert approval_response["statusCode"] == 200
-                assert "successfully" in approval_response["body"].lower()
-
-                # Verify IAM policy was attached
-                policies = iam.list_attached_role_policies(RoleName="ci-deployer")
-                attached_policies = policies["AttachedPolicies"]
-                assert len(attached_policies) > 0
-
-                # Find guardrails policy
-                guardrails_policy = None
-                for policy in attached_policies:
-                    if "guardrails-deny" in policy["PolicyName"]:
-                        guardrails_policy = policy
-                        break
-
-                assert guardrails_policy is not None, "Guardrails policy not attached"
-
-                # Verify policy document contains deny actions
-                policy_arn = guardrails_policy["PolicyArn"]
-                policy_version = iam.get_policy(PolicyArn=policy_arn)["Policy"]["DefaultVersionId"]
-                policy_doc = iam.get_policy_version(PolicyArn=policy_arn, VersionId=policy_version)[
-                    "PolicyVersion"
-                ]["Document"]
-
-                assert "Statement" in policy_doc
-                statement = policy_doc["Statement"][0]
-                assert statement["Effect"] == "Deny"
-                assert "ec2:RunInstances" in statement["Action"]
-                assert "ec2:CreateNatGateway" in statement["Action"]
-
-                # Verify execution updated in DynamoDB
-                execution = audit_store.get_execution(execution_id)
-                assert execution.status == "executed"
-                assert execution.executed_by == "user:alice"
-                assert "before" in execution.diff
-                assert "after" in execution.diff
-
-                # Verify confirmation notification sent
-                assert mock_post.call_count >= 1
-
-    @mock_aws
-    def test_approval_idempotency(self, temp_policies_dir):
-        """Test that approving twice doesn't execute twice (idempotency)."""
-        import boto3
-
-        # Setup mocked AWS resources
-        iam = boto3.client("iam", region_name="us-east-1")
-        dynamodb = boto3.client("dynamodb", region_name="us-east-1")
-
-        iam.create_role(
-            RoleName="ci-deployer",
-            AssumeRolePolicyDocument=json.dumps(
-                {
-                    "Version": "2012-10-17",
-                    "Statement": [
-                        {
-                            "Effect": "Allow",
-                            "Principal": {"Service": "ec2.amazonaws.com"},
-                            "Action": "sts:AssumeRole",
-                        }
-                    ],
-                }
-            ),
-        )
 
-        dynamodb.create_table(
-            TableName="autoguardrails-audit",
-            KeySchema=[{"AttributeName": "execution_id", "KeyType": "HASH"}],
-            AttributeDefinitions=[
-                {"AttributeName": "execution_id", "AttributeType": "S"},
-                {"AttributeName": "policy_id", "AttributeType": "S"},
-                {"AttributeName": "executed_at", "AttributeType": "S"},
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    "IndexName": "policy_id-executed_at-index",
-                    "KeySchema": [
-                        {"AttributeName": "policy_id", "KeyType": "HASH"},
-                        {"AttributeName": "executed_at", "KeyType": "RANGE"},
-                    ],
-                    "Projection": {"ProjectionType": "ALL"},
-                }
-            ],
-            BillingMode="PAY_PER_REQUEST",
-        )
+@pytest.fixture
+def policies_path(monkeypatch):
+    """Serve the manual approval policy from memory instead of YAML on disk.
 
-        event = {
-            "Records": [
-                {
-                    "EventSource": "aws:sns",
-                    "Sns": {
-                        "Message": json.dumps(
-                            {
-                                "budgetName": "monthly-budget",
-                                "notificationType": "ACTUAL",
-                                "thresholdType": "PERCENTAGE",
-                                "threshold": 90,
-                                "calculatedSpend": {
-                                    "actualSpend": {"amount": 600.0, "unit": "USD"}
-                                },
-                                "notificationArn": "arn:aws:budgets::123456789012:budget/monthly",
-                                "time": "2024-01-15T10:30:00Z",
-                            }
-                        )
-                    },
-                }
-            ]
-        }
+    YAML loading is covered by the policy engine tests; here it would only
+    add a directory round-trip per test. The returned path is still set as
+    POLICIES_PATH so the handler is driven exactly as in production.
+    """
+    monkeypatch.setattr(
+        "src.guardrails.handlers.budgets_event.load_policies_from_directory",
+        lambda path: [_MANUAL_POLICY],
+    )
+    monkeypatch.setenv("POLICIES_PATH", "/var/task/policies")
+    return "/var/task/policies"
 
-        context = MagicMock()
 
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/test",
-                "POLICIES_PATH": temp_policies_dir,
-                "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
-                "AWS_DEFAULT_REGION": "us-east-1",
-            },
-        ):
-            with patch("requests.post") as mock_post:
-                mock_response = MagicMock()
-                mock_response.status_code = 200
-                mock_post.return_value = mock_response
-
-                response = lambda_handler(event, context)
-                body = json.loads(response["body"])
-                execution_id = body["result"]["execution_id"]
-
-        # First approval
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/test",
-                "APPROVAL_SECRET": "test-secret",
-                "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
-                "AWS_DEFAULT_REGION": "us-east-1",
-            },
-        ):
-            with patch("requests.post") as mock_post:
-                mock_response = MagicMock()
-                mock_response.status_code = 200
-                mock_post.return_value = mock_response
-
-                handler = ApprovalWebhookHandler(approval_secret="test-secret")
-                approval_data = handler.generate_approval_url(
-                    execution_id=execution_id, base_url="https://api.example.com"
-                )
+@pytest.fixture
+def execution_id(policies_path, aws, lambda_context):
+    """Run a budget event through the handler and return the planned execution ID."""
+    with patch("requests.Session.post") as mock_post:
+        mock_post.return_value = _OK_RESPONSE
 
-                response1 = handler.handle_approval(
-                    execution_id=execution_id,
-                    signature=approval_data["signature"],
-                    timestamp=approval_data["timestamp"],
-                    user="alice",
-                )
+        response = lambda_handler(_BUDGET_EVENT, lambda_context)
 
-                assert response1["statusCode"] == 200
+    return json.loads(response["body"])["result"]["execution_id"]
 
-                # Get policy count after first approval
-                policies1 = iam.list_attached_role_policies(RoleName="ci-deployer")
-                policy_count1 = len(policies1["AttachedPolicies"])
 
-                # Second approval (should be rejected)
-                response2 = handler.handle_approval(
-                    execution_id=execution_id,
-                    signature=approval_data["signature"],
-                    timestamp=approval_data["timestamp"],
-                    user="alice",
-                )
+class TestE2EManualApprovalFlow:
+    """Test complete manual approval workflow."""
 
-                assert response2["statusCode"] == 409  # Conflict (already processed)
-                assert "already processed" in response2["body"].lower()
+    def test_manual_approval_end_to_end(
+        self, policies_path, aws, audit_store, monkeypatch, lambda_context
+    ):
+        """Test full manual approval flow from event to execution.
 
-                # Verify policy count didn't increase
-                policies2 = iam.list_attached_role_policies(RoleName="ci-deployer")
-                policy_count2 = len(policies2["AttachedPolicies"])
-                assert policy_count1 == policy_count2
+        Flow:
+        1. Budget event triggers lambda
+        2. Policy matches (manual mode)
+        3. Execution saved to DynamoDB (status: planned)
+        4. Slack notification sent with approval button
+        5. User clicks approval
+        6. Approval webhook executes guardrail
+        7. IAM deny policy attached
+        8. Execution updated (status: executed)
+        9. Confirmation sent to Slack
+        """
+        # === Step 1-4: Budget event → Policy match → Slack notification ===
+        with patch("requests.Session.post") as mock_post:
+            mock_post.return_value = _OK_RESPONSE
 
-    @mock_aws
-    def test_approval_link_expiration(self, temp_policies_dir):
-        """Test that expired approval links are rejected."""
-        import boto3
+            # Execute budget event handler
+            response = lambda_handler(_BUDGET_EVENT, lambda_context)
 
-        dynamodb = boto3.client("dynamodb", region_name="us-east-1")
-        iam = boto3.client("iam", region_name="us-east-1")
+            # Verify Lambda response
+            assert response["statusCode"] == 200
+            body = json.loads(response["body"])
+            assert body["status"] == "success"
+            assert body["mode"] == "manual"
+            assert body["policy_id"] == "test-manual-ec2-spike"
+            assert "result" in body
+            assert "execution_id" in body["result"]
 
-        iam.create_role(
-            RoleName="ci-deployer",
-            AssumeRolePolicyDocument=json.dumps(
-                {
-                    "Version": "2012-10-17",
-                    "Statement": [
-                        {
-                            "Effect": "Allow",
-                            "Principal": {"Service": "ec2.amazonaws.com"},
-                            "Action": "sts:AssumeRole",
-                        }
-                    ],
-                }
-            ),
-        )
+            execution_id = body["result"]["execution_id"]
 
-        dynamodb.create_table(
-            TableName="autoguardrails-audit",
-            KeySchema=[{"AttributeName": "execution_id", "KeyType": "HASH"}],
-            AttributeDefinitions=[
-                {"AttributeName": "execution_id", "AttributeType": "S"},
-                {"AttributeName": "policy_id", "AttributeType": "S"},
-                {"AttributeName": "executed_at", "AttributeType": "S"},
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    "IndexName": "policy_id-executed_at-index",
-                    "KeySchema": [
-                        {"AttributeName": "policy_id", "KeyType": "HASH"},
-                        {"AttributeName": "executed_at", "KeyType": "RANGE"},
-                    ],
-                    "Projection": {"ProjectionType": "ALL"},
-                }
-            ],
-            BillingMode="PAY_PER_REQUEST",
-        )
+            # Verify Slack notification sent
+            assert mock_post.call_count >= 1
 
-        event = {
-            "Records": [
-                {
-                    "EventSource": "aws:sns",
-                    "Sns": {
-                        "Message": json.dumps(
-                            {
-                                "budgetName": "monthly-budget",
-                                "notificationType": "ACTUAL",
-                                "thresholdType": "PERCENTAGE",
-                                "threshold": 90,
-                                "calculatedSpend": {
-                                    "actualSpend": {"amount": 600.0, "unit": "USD"}
-                                },
-                                "notificationArn": "arn:aws:budgets::123456789012:budget/monthly",
-                                "time": "2024-01-15T10:30:00Z",
-                            }
-                        )
-                    },
-                }
-            ]
-        }
+            # Find the approval request notification
+            payloads = [call[1]["json"] for call in mock_post.call_args_list]
+            approval_notification = _find_payload(payloads, "Approval Required")
+            assert approval_notification is not None, "No approval request notification found"
 
-        context = MagicMock()
+            # Verify approval button exists
+            assert _has_button(approval_notification), "No approval button found in notification"
 
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/test",
-                "POLICIES_PATH": temp_policies_dir,
-                "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
-                "AWS_DEFAULT_REGION": "us-east-1",
-            },
-        ):
-            with patch("requests.post") as mock_post:
-                mock_response = MagicMock()
-                mock_response.status_code = 200
-                mock_post.return_value = mock_response
-
-                response = lambda_handler(event, context)
-                body = json.loads(response["body"])
-                execution_id = body["result"]["execution_id"]
-
-        # Try approval with expired timestamp (2 hours ago)
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/test",
-                "APPROVAL_SECRET": "test-secret",
-                "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
-                "AWS_DEFAULT_REGION": "us-east-1",
-            },
-        ):
+            # Verify execution saved to DynamoDB
+            execution = audit_store.get_execution(execution_id)
+
+            assert execution is not None
+            assert execution.status == "planned"
+            assert execution.policy_id == "test-manual-ec2-spike"
+            assert execution.action == "attach_deny_policy"
+
+        # === Step 5-9: User approval → Execution → Confirmation ===
+        monkeypatch.setenv("APPROVAL_SECRET", "test-secret-key")
+
+        with patch("requests.Session.post") as mock_post:
+            mock_post.return_value = _OK_RESPONSE
+
+            # Generate approval URL
             handler = ApprovalWebhookHandler(
-                approval_secret="test-secret", approval_timeout_hours=1
+                audit_store=audit_store, approval_secret="test-secret-key"
+            )
+            approval_data = handler.generate_approval_url(
+                execution_id=execution_id,
+                base_url="https://api.example.com",
             )
 
-            # Generate signature with old timestamp
-            old_timestamp = (datetime.utcnow() - timedelta(hours=2)).isoformat()
-            signature = handler._generate_signature(execution_id, old_timestamp)
-
-            response = handler.handle_approval(
+            # Simulate user clicking approval button
+            approval_response = handler.handle_approval(
                 execution_id=execution_id,
-                signature=signature,
-                timestamp=old_timestamp,
+                signature=approval_data["signature"],
+                timestamp=approval_data["timestamp"],
                 user="alice",
             )
 
-            assert response["statusCode"] == 410  # Gone (expired)
-            assert "expired" in response["body"].lower()
-
-            # Verify no policy was attached
-            policies = iam.list_attached_role_policies(RoleName="ci-deployer")
-            assert len(policies["AttachedPolicies"]) == 0
+            # Verify approval succeeded
+            assert approval_response["statusCode"] == 200
+            assert "successfully" in approval_response["body"].lower()
 
-    @mock_aws
-    def test_approval_invalid_signature(self, temp_policies_dir):
-        """Test that invalid signatures are rejected."""
-        import boto3
+            # Verify IAM policy was attached
+            policies = aws.iam.list_attached_role_policies(RoleName="ci-deployer")
+            attached_policies = policies["AttachedPolicies"]
+            assert len(attached_policies) > 0
 
-        dynamodb = boto3.client("dynamodb", region_name="us-east-1")
-        iam = boto3.client("iam", region_name="us-east-1")
-
-        iam.create_role(
-            RoleName="ci-deployer",
-            AssumeRolePolicyDocument=json.dumps(
-                {
-                    "Version": "2012-10-17",
-                    "Statement": [
-                        {
-                            "Effect": "Allow",
-                            "Principal": {"Service": "ec2.amazonaws.com"},
-                            "Action": "sts:AssumeRole",
-                        }
-                    ],
-                }
-            ),
-        )
+            # Find guardrails policy
+            guardrails_policy = next(
+                (p for p in attached_policies if "guardrails-deny" in p["PolicyName"]), None
+            )
 
-        dynamodb.create_table(
-            TableName="autoguardrails-audit",
-            KeySchema=[{"AttributeName": "execution_id", "KeyType": "HASH"}],
-            AttributeDefinitions=[
-                {"AttributeName": "execution_id", "AttributeType": "S"},
-                {"AttributeName": "policy_id", "AttributeType": "S"},
-                {"AttributeName": "executed_at", "AttributeType": "S"},
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    "IndexName": "policy_id-executed_at-index",
-                    "KeySchema": [
-                        {"AttributeName": "policy_id", "KeyType": "HASH"},
-                        {"AttributeName": "executed_at", "KeyType": "RANGE"},
-                    ],
-                    "Projection": {"ProjectionType": "ALL"},
-                }
-            ],
-            BillingMode="PAY_PER_REQUEST",
-        )
+            assert guardrails_policy is not None, "Guardrails policy not attached"
+
+            # Verify execution updated in DynamoDB. The recorded diff names the
+            # attached policy and its deny actions; the phase-3 end-to-end test
+            # reads the policy document back from IAM itself.
+            execution = audit_store.get_execution(execution_id)
+            assert execution.status == "executed"
+            assert execution.executed_by == "user:alice"
+            assert "before" in execution.diff
+            assert "after" in execution.diff
+            assert execution.diff["policy_arn"] == guardrails_policy["PolicyArn"]
+            assert execution.diff["denied_actions"] == ["ec2:RunInstances", "ec2:CreateNatGateway"]
+
+            # Verify confirmation notification sent
+            assert mock_post.call_count >= 1
+
+    @pytest.mark.parametrize(
+        ("scenario", "expected_status", "expected_text", "expected_attached"),
+        [
+            pytest.param("replayed", 409, "already processed", 1, id="replayed"),
+            pytest.param("expired", 410, "expired", 0, id="expired"),
+            pytest.param("invalid_signature", 403, "invalid signature", 0, id="invalid-signature"),
+        ],
+    )
+    def test_approval_rejected(
+        self,
+        execution_id,
+        aws,
+        audit_store,
+        monkeypatch,
+        scenario,
+        expected_status,
+        expected_text,
+        expected_attached,
+    ):
+        """Test that replayed, expired and forged approvals execute nothing.
+
+        A replayed approval must not attach a second policy; expired and
+        invalid ones must not attach any.
+        """
+        monkeypatch.setenv("APPROVAL_SECRET", "test-secret")
 
-        event = {
-            "Records": [
-                {
-                    "EventSource": "aws:sns",
-                    "Sns": {
-                        "Message": json.dumps(
-                            {
-                                "budgetName": "monthly-budget",
-                                "notificationType": "ACTUAL",
-                                "thresholdType": "PERCENTAGE",
-                                "threshold": 90,
-                                "calculatedSpend": {
-                                    "actualSpend": {"amount": 600.0, "unit": "USD"}
-                                },
-                                "notificationArn": "arn:aws:budgets::123456789012:budget/monthly",
-                                "time": "2024-01-15T10:30:00Z",
-                            }
-                        )
-                    },
-                }
-            ]
-        }
+        with patch("requests.Session.post") as mock_post:
+            mock_post.return_value = _OK_RESPONSE
 
-        context = MagicMock()
+            handler = ApprovalWebhookHandler(
+                approval_secret="test-secret", approval_timeout_hours=1
+            )
 
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/test",
-                "POLICIES_PATH": temp_policies_dir,
-                "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
-                "AWS_DEFAULT_REGION": "us-east-1",
-            },
-        ):
-            with patch("requests.post") as mock_post:
-                mock_response = MagicMock()
-                mock_response.status_code = 200
-                mock_post.return_value = mock_response
-
-                response = lambda_handler(event, context)
-                body = json.loads(response["body"])
-                execution_id = body["result"]["execution_id"]
-
-        # Try approval with invalid signature
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/test",
-                "APPROVAL_SECRET": "test-secret",
-                "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
-                "AWS_DEFAULT_REGION": "us-east-1",
-            },
-        ):
-            handler = ApprovalWebhookHandler(approval_secret="test-secret")
+            if scenario == "expired":
+                # Signature is valid but the timestamp is far past the 1h window
+                timestamp = _EXPIRED_TIMESTAMP
+                signature = handler._generate_signature(execution_id, timestamp)
+            elif scenario == "invalid_signature":
+                # Signature is checked before expiry, so any timestamp will do
+                timestamp = _EXPIRED_TIMESTAMP
+                signature = "invalid-signature-12345"
+            else:
+                # Replay protection doesn't depend on the signature scheme; the
+                # end-to-end test and the cases above cover the real HMAC path
+                monkeypatch.setattr(
+                    ApprovalWebhookHandler, "_generate_signature", lambda self, eid, ts: "stub-sig"
+                )
+                monkeypatch.setattr(
+                    ApprovalWebhookHandler,
+                    "_verify_signature",
+                    lambda self, eid, ts, sig: sig == "stub-sig",
+                )
+                approval_data = handler.generate_approval_url(
+                    execution_id=execution_id, base_url="https://api.example.com"
+                )
+                timestamp = approval_data["timestamp"]
+                signature = approval_data["signature"]
 
-            timestamp = datetime.utcnow().isoformat()
-            invalid_signature = "invalid-signature-12345"
+                first_response = handler.handle_approval(
+                    execution_id=execution_id,
+                    signature=signature,
+                    timestamp=timestamp,
+                    user="alice",
+                )
+                assert first_response["statusCode"] == 200
 
             response = handler.handle_approval(
                 execution_id=execution_id,
-                signature=invalid_signature,
+                signature=signature,
                 timestamp=timestamp,
                 user="alice",
             )
 
-            assert response["statusCode"] == 403  # Forbidden
-            assert "invalid signature" in response["body"].lower()
+        assert response["statusCode"] == expected_status
+        assert expected_text in response["body"].lower()
 
-            # Verify no policy was attached
-            policies = iam.list_attached_role_policies(RoleName="ci-deployer")
-            assert len(policies["AttachedPolicies"]) == 0
+        policies = aws.iam.list_attached_role_policies(RoleName="ci-deployer")
+        assert len(policies["AttachedPolicies"]) == expected_attached
@@ -0,0 +1,63 @@
+"""Shared fixtures for the unit tests."""
+
+import os
+from unittest.mock import patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+
+@pytest.fixture(scope="session")
+def aws_credentials():
+    """Mock AWS credentials for boto3, restored when the session ends."""
+    with patch.dict(
+        os.environ,
+        {
+            "AWS_ACCESS_KEY_ID": "testing",
+            "AWS_SECRET_ACCESS_KEY": "testing",
+            "AWS_SECURITY_TOKEN": "testing",
+            "AWS_SESSION_TOKEN": "testing",
+            "AWS_DEFAULT_REGION": "us-east-1",
+        },
+    ):
+        yield
+
+
+@pytest.fixture(scope="module")
+def mock_iam(aws_credentials):
+    """Mock AWS IAM once per module; _iam_cleanup empties it between tests.
+
+    Module rather than session scope: an outer mock_aws that is still active
+    stops other modules' mock_aws from resetting the backends on entry.
+    """
+    with mock_aws():
+        yield boto3.client("iam", region_name="us-east-1")
+
+
+@pytest.fixture(autouse=True)
+def _iam_cleanup(request):
+    """Delete the roles, users and customer policies a mock_iam test created.
+
+    Cheaper than resetting the IAM backend, which rebuilds moto's catalogue
+    of AWS managed policies every time.
+    """
+    yield
+    if "mock_iam" not in request.fixturenames:
+        return
+
+    iam = request.getfixturevalue("mock_iam")
+    for role in iam.list_roles()["Roles"]:
+        if role["Path"].startswith("/aws-service-role/"):
+            continue
+        name = role["RoleName"]
+        for policy in iam.list_attached_role_policies(RoleName=name)["AttachedPolicies"]:
+            iam.detach_role_policy(RoleName=name, PolicyArn=policy["PolicyArn"])
+        iam.delete_role(RoleName=name)
+    for user in iam.list_users()["Users"]:
+        name = user["UserName"]
+        for policy in iam.list_attached_user_policies(UserName=name)["AttachedPolicies"]:
+            iam.detach_user_policy(UserName=name, PolicyArn=policy["PolicyArn"])
+        iam.delete_user(UserName=name)
+    for policy in iam.list_policies(Scope="Local")["Policies"]:
+        iam.delete_policy(PolicyArn=policy["Arn"])
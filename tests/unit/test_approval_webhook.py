@@ -5,40 +5,140 @@ Tests the approval webhook flow including signature verification,
 expiration checking, execution orchestration, and Lambda handler.
 """
 
-import json
 from datetime import datetime, timedelta
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import DEFAULT, MagicMock, Mock, patch
 
 import pytest
 
+from src.guardrails.audit_store import AuditStore
+from src.guardrails.executor_iam import IAMExecutor
 from src.guardrails.handlers.approval_webhook import (
     ApprovalWebhookHandler,
     lambda_handler,
 )
 from src.guardrails.models import ActionExecution
+from src.guardrails.notifier_slack import SlackNotifier
+
+
+# Keep this module on one xdist worker so the module-scoped handlers are built once
+pytestmark = pytest.mark.xdist_group(name="approval_webhook")
+
+
+@pytest.fixture(scope="module")
+def handler():
+    """Handler for signature and expiry tests; its mocks are never used."""
+    return ApprovalWebhookHandler(
+        audit_store=Mock(spec=AuditStore),
+        executor=Mock(spec=IAMExecutor),
+        notifier=Mock(spec=SlackNotifier),
+        approval_secret="test-secret",
+        approval_timeout_hours=1,
+    )
+
+
+@pytest.fixture(scope="module")
+def shared_dependencies():
+    """Create the approval handler and its mocks once per module."""
+    mock_audit = Mock(spec=AuditStore)
+    mock_executor = Mock(spec=IAMExecutor)
+    mock_notifier = Mock(spec=SlackNotifier)
+
+    handler = ApprovalWebhookHandler(
+        audit_store=mock_audit,
+        executor=mock_executor,
+        notifier=mock_notifier,
+        approval_secret="test-secret",
+    )
+
+    return handler, mock_audit, mock_executor, mock_notifier
+
+
+# Fields shared by every ActionExecution built in these tests
+_EXECUTION_DEFAULTS = {
+    "policy_id": "test-policy",
+    "event_id": "evt-456",
+    "executed_by": "system",
+    "action": "attach_deny_policy",
+    "target": "arn:aws:iam::123456789012:role/test",
+    "diff": {},
+}
+
+# Planned execution diff carrying the deny actions the approval will apply
+_PLANNED_DIFF = {"policy_document": {"Statement": [{"Action": ["ec2:RunInstances"]}]}}
+
+# Executor result diff after the deny policy is attached
+_EXECUTED_DIFF = {"before": [], "after": ["arn:aws:iam::123456789012:policy/test"]}
+
+
+def _make_execution(**overrides) -> ActionExecution:
+    """Build an ActionExecution from the shared defaults plus overrides."""
+    return ActionExecution(**{**_EXECUTION_DEFAULTS, **overrides})
+
+
+# Pinned handler clock for expiry tests: 2024-06-01T00:00:00Z in epoch seconds
+_NOW = 1717200000
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    """Pin the approval handler's clock to _NOW."""
+    monkeypatch.setattr(
+        "src.guardrails.handlers.approval_webhook.time", SimpleNamespace(time=lambda: _NOW)
+    )
+
+
+def _epoch_ago(**delta) -> str:
+    """Approval timestamp (Unix epoch seconds) for the given time before _NOW."""
+    return str(_NOW - int(timedelta(**delta).total_seconds()))
+
+
+@pytest.fixture(scope="module")
+def valid_creds(shared_dependencies):
+    """Current (timestamp, signature) pair for exec-123, signed once per module."""
+    handler = shared_dependencies[0]
+    timestamp = _epoch_ago()
+    return timestamp, handler._generate_signature("exec-123", timestamp)
+
+
+@pytest.fixture(scope="module")
+def forged_creds():
+    """Current timestamp paired with a signature the handler never issued."""
+    return _epoch_ago(), "invalid-sig"
+
+
+@pytest.fixture(scope="module")
+def expired_creds(shared_dependencies):
+    """(timestamp, signature) pair for exec-123 from outside the approval window."""
+    handler = shared_dependencies[0]
+    timestamp = _epoch_ago(hours=2)
+    return timestamp, handler._generate_signature("exec-123", timestamp)
 
 
 class TestApprovalWebhookHandlerInit:
     """Test ApprovalWebhookHandler initialization."""
 
-    @patch("src.guardrails.handlers.approval_webhook.SlackNotifier")
-    @patch("src.guardrails.handlers.approval_webhook.IAMExecutor")
-    @patch("src.guardrails.handlers.approval_webhook.AuditStore")
-    def test_init_with_defaults(self, mock_audit, mock_executor, mock_notifier):
+    @patch.multiple(
+        "src.guardrails.handlers.approval_webhook",
+        AuditStore=DEFAULT,
+        IAMExecutor=DEFAULT,
+        SlackNotifier=DEFAULT,
+    )
+    def test_init_with_defaults(self, **mocks):
         """Test initialization with default dependencies."""
         handler = ApprovalWebhookHandler()
 
-        assert handler.audit_store is not None
-        assert handler.executor is not None
-        assert handler.notifier is not None
+        assert handler.audit_store is mocks["AuditStore"].return_value
+        assert handler.executor is mocks["IAMExecutor"].return_value
+        assert handler.notifier is mocks["SlackNotifier"].return_value
         assert handler.approval_secret is not None
         assert handler.approval_timeout_hours == 1
 
     def test_init_with_custom_values(self):
         """Test initialization with custom dependencies."""
-        mock_audit = MagicMock()
-        mock_executor = MagicMock()
-        mock_notifier = MagicMock()
+        mock_audit = Mock(spec=AuditStore)
+        mock_executor = Mock(spec=IAMExecutor)
+        mock_notifier = Mock(spec=SlackNotifier)
 
         handler = ApprovalWebhookHandler(
             audit_store=mock_audit,
@@ -58,16 +158,6 @@ class TestApprovalWebhookHandlerInit:
 class TestSignatureGeneration:
     """Test signature generation and verification."""
 
-    @pytest.fixture
-    def handler(self):
-        """Create handler with mocked dependencies."""
-        return ApprovalWebhookHandler(
-            audit_store=MagicMock(),
-            executor=MagicMock(),
-            notifier=MagicMock(),
-            approval_secret="test-secret",
-        )
-
     def test_generate_signature_deterministic(self, handler):
         """Test that signature generation is deterministic."""
 
@@ -78,7 +168,7 @@ class TestSignatureGeneration:
         sig2 = handler._generate_signature(execution_id, timestamp)
 
         assert sig1 == sig2
-        assert len(sig1) == 64  # SHA256 hex digest
+        assert len(sig1) == 43  # Unpadded base64url of the SHA256 digest
 
     def test_verify_signature_valid(self, handler):
         """Test signature verification with valid signature."""
@@ -88,6 +178,14 @@ class TestSignatureGeneration:
 
         assert handler._verify_signature(execution_id, timestamp, signature) is True
 
+    def test_verify_signature_rejects_padded_variant(self, handler):
+        """Test that only the unpadded encoding issued in URLs is accepted."""
+        execution_id = "exec-123"
+        timestamp = "2024-01-01T00:00:00"
+        signature = handler._generate_signature(execution_id, timestamp)
+
+        assert handler._verify_signature(execution_id, timestamp, signature + "=") is False
+
     def test_verify_signature_invalid(self, handler):
         """Test signature verification with invalid signature."""
         execution_id = "exec-123"
@@ -99,15 +197,15 @@ class TestSignatureGeneration:
     def test_verify_signature_wrong_secret(self):
         """Test signature verification with different secret."""
         handler1 = ApprovalWebhookHandler(
-            audit_store=MagicMock(),
-            executor=MagicMock(),
-            notifier=MagicMock(),
+            audit_store=Mock(spec=AuditStore),
+            executor=Mock(spec=IAMExecutor),
+            notifier=Mock(spec=SlackNotifier),
             approval_secret="secret-1",
         )
         handler2 = ApprovalWebhookHandler(
-            audit_store=MagicMock(),
-            executor=MagicMock(),
-            notifier=MagicMock(),
+            audit_store=Mock(spec=AuditStore),
+            executor=Mock(spec=IAMExecutor),
+            notifier=Mock(spec=SlackNotifier),
             approval_secret="secret-2",
         )
 
@@ -118,40 +216,30 @@ class TestSignatureGeneration:
         assert handler2._verify_signature(execution_id, timestamp, signature) is False
 
 
+@pytest.mark.usefixtures("frozen_clock")
 class TestTimestampExpiration:
     """Test timestamp expiration logic."""
 
-    @pytest.fixture
-    def handler(self):
-        """Create handler with mocked dependencies."""
-        return ApprovalWebhookHandler(
-            audit_store=MagicMock(),
-            executor=MagicMock(),
-            notifier=MagicMock(),
-            approval_timeout_hours=1,
-        )
-
     def test_not_expired(self, handler):
         """Test timestamp within expiration window."""
 
         # 30 minutes ago
-        timestamp = (datetime.utcnow() - timedelta(minutes=30)).isoformat()
+        timestamp = _epoch_ago(minutes=30)
 
         assert handler._is_expired(timestamp) is False
 
     def test_expired(self, handler):
         """Test timestamp beyond expiration window."""
         # 2 hours ago
-        timestamp = (datetime.utcnow() - timedelta(hours=2)).isoformat()
+        timestamp = _epoch_ago(hours=2)
 
         assert handler._is_expired(timestamp) is True
 
     def test_exactly_at_expiration(self, handler):
         """Test timestamp exactly at expiration boundary."""
-        # Exactly 1 hour ago (should be expired due to > comparison)
-        timestamp = (datetime.utcnow() - timedelta(hours=1, seconds=1)).isoformat()
-
-        assert handler._is_expired(timestamp) is True
+        # Exactly 1 hour ago is still valid (> comparison); one second more is not
+        assert handler._is_expired(_epoch_ago(hours=1)) is False
+        assert handler._is_expired(_epoch_ago(hours=1, seconds=1)) is True
 
     def test_invalid_timestamp_format(self, handler):
         """Test invalid timestamp format (treated as expired)."""
@@ -159,6 +247,10 @@ class TestTimestampExpiration:
         assert handler._is_expired("invalid-timestamp") is True
         assert handler._is_expired("") is True
 
+    def test_iso_timestamp_treated_as_expired(self, handler):
+        """Test that links signed with an ISO8601 timestamp are no longer accepted."""
+        assert handler._is_expired(datetime.utcnow().isoformat()) is True
+
 
 class TestGenerateApprovalUrl:
     """Test approval URL generation."""
@@ -166,9 +258,9 @@ class TestGenerateApprovalUrl:
     def test_generate_approval_url(self):
         """Test approval URL generation with all components."""
         handler = ApprovalWebhookHandler(
-            audit_store=MagicMock(),
-            executor=MagicMock(),
-            notifier=MagicMock(),
+            audit_store=Mock(spec=AuditStore),
+            executor=Mock(spec=IAMExecutor),
+            notifier=Mock(spec=SlackNotifier),
             approval_secret="test-secret",
         )
 
@@ -191,67 +283,83 @@ class TestGenerateApprovalUrl:
         assert result["signature"] in url
         assert result["timestamp"] in url
 
+    def test_generate_approval_url_rejects_unsafe_id(self, handler):
+        """Test that IDs needing percent-encoding are refused."""
+        with pytest.raises(ValueError, match="not URL-safe"):
+            handler.generate_approval_url(
+                execution_id="exec-123&id=other", base_url="https://api.example.com"
+            )
+
 
+@pytest.mark.usefixtures("frozen_clock")
 class TestHandleApproval:
     """Test approval handling flow."""
 
     @pytest.fixture
-    def mock_dependencies(self):
-        """Create mock dependencies."""
-        mock_audit = MagicMock()
-        mock_executor = MagicMock()
-        mock_notifier = MagicMock()
+    def mock_dependencies(self, shared_dependencies):
+        """Shared handler and mocks, with calls and configured results cleared."""
+        _, *mocks = shared_dependencies
+        for mock in mocks:
+            mock.reset_mock(return_value=True, side_effect=True)
+        return shared_dependencies
 
-        handler = ApprovalWebhookHandler(
-            audit_store=mock_audit,
-            executor=mock_executor,
-            notifier=mock_notifier,
-            approval_secret="test-secret",
-        )
-
-        return handler, mock_audit, mock_executor, mock_notifier
-
-    def test_handle_approval_invalid_signature(self, mock_dependencies):
-        """Test handling approval with invalid signature."""
-        handler, _, _, _ = mock_dependencies
-
-        timestamp = datetime.utcnow().isoformat()
-        response = handler.handle_approval(
-            execution_id="exec-123",
-            signature="invalid-sig",
-            timestamp=timestamp,
-            user="test-user",
+    @pytest.fixture
+    def executed_result(self):
+        """What execute_action_plan returns on success.
+
+        A tuple is enough since the handler only reads the first element. It is
+        rebuilt per test because the handler rewrites the record's execution_id.
+        """
+        return (
+            _make_execution(
+                execution_id="exec-new",
+                status="executed",
+                executed_by="user:test-user",
+                diff=_EXECUTED_DIFF,
+            ),
         )
 
-        assert response["statusCode"] == 403
-        assert "Invalid signature" in response["body"]
-
-    def test_handle_approval_expired_link(self, mock_dependencies):
-        """Test handling approval with expired link."""
-        handler, _, _, _ = mock_dependencies
-
-        # 2 hours ago
-        timestamp = (datetime.utcnow() - timedelta(hours=2)).isoformat()
-        signature = handler._generate_signature("exec-123", timestamp)
+    @pytest.mark.parametrize(
+        ("creds", "stored_status", "executor_error", "expected_status", "body_substr"),
+        [
+            pytest.param(
+                "forged_creds", None, None, 403, "invalid signature", id="invalid_signature"
+            ),
+            pytest.param("expired_creds", None, None, 410, "expired", id="expired_link"),
+            pytest.param("valid_creds", None, None, 404, "not found", id="execution_not_found"),
+            pytest.param(
+                "valid_creds", "executed", None, 409, "already processed", id="already_processed"
+            ),
+            pytest.param(
+                "valid_creds",
+                "planned",
+                Exception("IAM error"),
+                500,
+                "failed",
+                id="execution_failure",
+            ),
+        ],
+    )
+    def test_handle_approval_rejected(
+        self,
+        request,
+        mock_dependencies,
+        creds,
+        stored_status,
+        executor_error,
+        expected_status,
+        body_substr,
+    ):
+        """Test each way an approval request fails before or during execution."""
+        handler, mock_audit, mock_executor, _ = mock_dependencies
+        timestamp, signature = request.getfixturevalue(creds)
 
-        response = handler.handle_approval(
-            execution_id="exec-123",
-            signature=signature,
-            timestamp=timestamp,
-            user="test-user",
+        mock_audit.get_execution.return_value = (
+            _make_execution(execution_id="exec-123", status=stored_status, diff=_PLANNED_DIFF)
+            if stored_status
+            else None
         )
-
-        assert response["statusCode"] == 410
-        assert "expired" in response["body"].lower()
-
-    def test_handle_approval_execution_not_found(self, mock_dependencies):
-        """Test handling approval when execution doesn't exist."""
-        handler, mock_audit, _, _ = mock_dependencies
-
-        mock_audit.get_execution.return_value = None
-
-        timestamp = datetime.utcnow().isoformat()
-        signature = handler._generate_signature("exec-123", timestamp)
+        mock_executor.execute_action_plan.side_effect = executor_error
 
         response = handler.handle_approval(
             execution_id="exec-123",
@@ -260,71 +368,30 @@ class TestHandleApproval:
             user="test-user",
         )
 
-        assert response["statusCode"] == 404
-        assert "not found" in response["body"].lower()
-
-    def test_handle_approval_already_processed(self, mock_dependencies):
-        """Test handling approval when already processed (idempotency)."""
-        handler, mock_audit, _, _ = mock_dependencies
-
-        # Mock execution with non-planned status
-        mock_execution = ActionExecution(
-            execution_id="exec-123",
-            policy_id="test-policy",
-            event_id="evt-456",
-            status="executed",  # Already executed
-            executed_by="system",
-            action="attach_deny_policy",
-            target="arn:aws:iam::123456789012:role/test",
-            diff={},
-        )
-        mock_audit.get_execution.return_value = mock_execution
+        assert response["statusCode"] == expected_status
+        assert body_substr in response["body"].lower()
 
-        timestamp = datetime.utcnow().isoformat()
-        signature = handler._generate_signature("exec-123", timestamp)
+        if executor_error:
+            # The stored execution is marked failed
+            mock_audit.update_execution.assert_called_once()
+            assert mock_audit.update_execution.call_args[0][0].status == "failed"
+        else:
+            mock_audit.update_execution.assert_not_called()
 
-        response = handler.handle_approval(
-            execution_id="exec-123",
-            signature=signature,
-            timestamp=timestamp,
-            user="test-user",
-        )
-
-        assert response["statusCode"] == 409
-        assert "already processed" in response["body"].lower()
-
-    def test_handle_approval_success(self, mock_dependencies):
+    def test_handle_approval_success(self, mock_dependencies, valid_creds, executed_result):
         """Test successful approval handling."""
         handler, mock_audit, mock_executor, mock_notifier = mock_dependencies
 
         # Mock planned execution
-        mock_execution = ActionExecution(
-            execution_id="exec-123",
-            policy_id="test-policy",
-            event_id="evt-456",
-            status="planned",
-            executed_by="system",
-            action="attach_deny_policy",
-            target="arn:aws:iam::123456789012:role/test",
-            diff={"policy_document": {"Statement": [{"Action": ["ec2:RunInstances"]}]}},
+        mock_execution = _make_execution(
+            execution_id="exec-123", status="planned", diff=_PLANNED_DIFF
         )
         mock_audit.get_execution.return_value = mock_execution
 
         # Mock executor returning successful execution
-        executed_execution = ActionExecution(
-            execution_id="exec-new",
-            policy_id="test-policy",
-            event_id="evt-456",
-            status="executed",
-            executed_by="user:test-user",
-            action="attach_deny_policy",
-            target="arn:aws:iam::123456789012:role/test",
-            diff={"before": [], "after": ["arn:aws:iam::123456789012:policy/test"]},
-        )
-        mock_executor.execute_action_plan.return_value = [executed_execution]
+        mock_executor.execute_action_plan.return_value = executed_result
 
-        timestamp = datetime.utcnow().isoformat()
-        signature = handler._generate_signature("exec-123", timestamp)
+        timestamp, signature = valid_creds
 
         response = handler.handle_approval(
             execution_id="exec-123",
@@ -345,79 +412,25 @@ class TestHandleApproval:
         # Verify notification was sent
         mock_notifier.send_execution_confirmation.assert_called_once()
 
-    def test_handle_approval_execution_failure(self, mock_dependencies):
-        """Test approval handling when execution fails."""
-        handler, mock_audit, mock_executor, _ = mock_dependencies
-
-        # Mock planned execution
-        mock_execution = ActionExecution(
-            execution_id="exec-123",
-            policy_id="test-policy",
-            event_id="evt-456",
-            status="planned",
-            executed_by="system",
-            action="attach_deny_policy",
-            target="arn:aws:iam::123456789012:role/test",
-            diff={"policy_document": {"Statement": [{"Action": ["ec2:RunInstances"]}]}},
-        )
-        mock_audit.get_execution.return_value = mock_execution
-
-        # Mock executor raising exception
-        mock_executor.execute_action_plan.side_effect = Exception("IAM error")
-
-        timestamp = datetime.utcnow().isoformat()
-        signature = handler._generate_signature("exec-123", timestamp)
-
-        response = handler.handle_approval(
-            execution_id="exec-123",
-            signature=signature,
-            timestamp=timestamp,
-            user="test-user",
-        )
-
-        assert response["statusCode"] == 500
-        assert "failed" in response["body"].lower()
-
-        # Verify execution status was updated to failed
-        mock_audit.update_execution.assert_called_once()
-        updated_execution = mock_audit.update_execution.call_args[0][0]
-        assert updated_execution.status == "failed"
-
-    def test_handle_approval_notification_failure_non_fatal(self, mock_dependencies):
+    def test_handle_approval_notification_failure_non_fatal(
+        self, mock_dependencies, valid_creds, executed_result
+    ):
         """Test that notification failure doesn't fail the approval."""
         handler, mock_audit, mock_executor, mock_notifier = mock_dependencies
 
         # Mock planned execution
-        mock_execution = ActionExecution(
-            execution_id="exec-123",
-            policy_id="test-policy",
-            event_id="evt-456",
-            status="planned",
-            executed_by="system",
-            action="attach_deny_policy",
-            target="arn:aws:iam::123456789012:role/test",
-            diff={"policy_document": {"Statement": [{"Action": ["ec2:RunInstances"]}]}},
+        mock_execution = _make_execution(
+            execution_id="exec-123", status="planned", diff=_PLANNED_DIFF
         )
         mock_audit.get_execution.return_value = mock_execution
 
         # Mock successful execution
-        executed_execution = ActionExecution(
-            execution_id="exec-new",
-            policy_id="test-policy",
-            event_id="evt-456",
-            status="executed",
-            executed_by="user:test-user",
-            action="attach_deny_policy",
-            target="arn:aws:iam::123456789012:role/test",
-            diff={"before": [], "after": ["arn:aws:iam::123456789012:policy/test"]},
-        )
-        mock_executor.execute_action_plan.return_value = [executed_execution]
+        mock_executor.execute_action_plan.return_value = executed_result
 
         # Mock notification failure
         mock_notifier.send_execution_confirmation.side_effect = Exception("Slack error")
 
-        timestamp = datetime.utcnow().isoformat()
-        signature = handler._generate_signature("exec-123", timestamp)
+        timestamp, signature = valid_creds
 
         response = handler.handle_approval(
             execution_id="exec-123",
@@ -471,8 +484,13 @@ class TestLambdaHandler:
             "exec-123", "test-sig", "2024-01-01T00:00:00", "unknown"
         )
 
+    @pytest.mark.parametrize(
+        "body",
+        ['{"user": {"name": "alice"}}', {"user": {"name": "alice"}}],
+        ids=["json_string", "decoded_dict"],
+    )
     @patch("src.guardrails.handlers.approval_webhook.ApprovalWebhookHandler")
-    def test_lambda_handler_with_slack_user(self, mock_handler_class):
+    def test_lambda_handler_with_slack_user(self, mock_handler_class, body):
         """Test Lambda handler extracting user from Slack payload."""
         # Mock handler instance
         mock_handler = MagicMock()
@@ -488,7 +506,7 @@ class TestLambdaHandler:
                 "sig": "test-sig",
                 "ts": "2024-01-01T00:00:00",
             },
-            "body": json.dumps({"user": {"name": "alice"}}),
+            "body": body,
         }
 
         response = lambda_handler(event, None)
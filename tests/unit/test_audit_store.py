@@ -1,45 +1,107 @@
 """Tests for Audit Store."""
 
+import itertools
 from datetime import datetime, timedelta
-from uuid import uuid4
 
 import boto3
 import pytest
 from moto import mock_aws
+from moto.core import DEFAULT_ACCOUNT_ID
+from moto.dynamodb.models import dynamodb_backends
 
-from src.guardrails.audit_store import AuditStore, create_audit_table
+from src.guardrails.audit_store import TRANSACT_WRITE_MAX_ITEMS, AuditStore, create_audit_table
 from src.guardrails.models import ActionExecution
 
 
-@pytest.fixture
-def mock_dynamodb():
-    """Set up mocked DynamoDB."""
+# Fixed clock for every timestamp in this module; the store never reads the time
+_NOW = datetime(2024, 1, 15, 10, 30, 0)
+
+# Unique execution IDs without reading /dev/urandom; nothing here checks UUID shape
+_ids = itertools.count()
+
+
+@pytest.fixture(scope="module")
+def moto_session():
+    """Activate moto and create the audit table once per module.
+
+    Module rather than session scope: other modules reset every moto backend
+    between their tests, which would drop this table.
+    """
     with mock_aws():
-        # Create table
         create_audit_table(table_name="test-audit", region="us-east-1")
         yield
 
 
+@pytest.fixture(scope="module")
+def ddb_resource(moto_session):
+    """DynamoDB resource for tests that inspect tables directly, built once."""
+    return boto3.resource("dynamodb", region_name="us-east-1")
+
+
 @pytest.fixture
-def audit_store(mock_dynamodb):
-    """Create AuditStore instance with mocked DynamoDB."""
+def mock_dynamodb(moto_session):
+    """Mocked DynamoDB with an empty audit table for each test."""
+    dynamodb_backends[DEFAULT_ACCOUNT_ID]["us-east-1"].get_table("test-audit").items.clear()
+
+
+@pytest.fixture(scope="module")
+def shared_audit_store(moto_session):
+    """One AuditStore per module, so its boto3 resource is built once."""
     return AuditStore(table_name="test-audit", region="us-east-1")
 
 
 @pytest.fixture
+def audit_store(mock_dynamodb, shared_audit_store):
+    """The module's AuditStore over an empty audit table."""
+    return shared_audit_store
+
+
+# Rows written once to a second table that the per-test clear leaves alone
+_SEEDED_POLICY = "seeded-policy"
+_SEEDED_COUNT = 20
+
+
+@pytest.fixture(scope="module")
+def seeded_store(moto_session):
+    """Store over a table seeded once with _SEEDED_COUNT executions of one policy.
+
+    exec-0 is the newest; each later ID is one minute older. Tests must only read.
+    """
+    create_audit_table(table_name="test-audit-seeded", region="us-east-1")
+    store = AuditStore(table_name="test-audit-seeded", region="us-east-1")
+    store.save_executions_batch(
+        [
+            ActionExecution(
+                execution_id=f"exec-{i}",
+                policy_id=_SEEDED_POLICY,
+                event_id=f"evt-{i}",
+                status="executed",
+                executed_at=_NOW - timedelta(minutes=i),
+                executed_by="test",
+                action="attach_deny_policy",
+                target="arn:aws:iam::123456789012:role/test",
+                diff={},
+            )
+            for i in range(_SEEDED_COUNT)
+        ]
+    )
+    return store
+
+
+@pytest.fixture(scope="module")
 def sample_execution():
-    """Create sample execution for testing."""
+    """Sample execution shared by the module; use model_copy() to vary it."""
     return ActionExecution(
-        execution_id=f"exec-{uuid4()}",
+        execution_id=f"exec-seq-{next(_ids)}",
         policy_id="test-policy",
         event_id="evt-123",
         status="executed",
-        executed_at=datetime.utcnow(),
+        executed_at=_NOW,
         executed_by="test-user",
         action="attach_deny_policy",
         target="arn:aws:iam::123456789012:role/test",
         diff={"policy_arn": "arn:aws:iam::123456789012:policy/test"},
-        ttl_expires_at=datetime.utcnow() + timedelta(hours=2),
+        ttl_expires_at=_NOW + timedelta(hours=2),
     )
 
 
@@ -77,7 +139,7 @@ class TestSaveExecution:
     def test_save_execution_minimal_fields(self, audit_store):
         """Test saving execution with minimal fields."""
         execution = ActionExecution(
-            execution_id=f"exec-{uuid4()}",
+            execution_id=f"exec-seq-{next(_ids)}",
             policy_id="test-policy",
             event_id="evt-123",
             status="planned",
@@ -100,17 +162,17 @@ class TestSaveExecution:
     def test_save_execution_with_all_fields(self, audit_store):
         """Test saving execution with all optional fields."""
         execution = ActionExecution(
-            execution_id=f"exec-{uuid4()}",
+            execution_id=f"exec-seq-{next(_ids)}",
             policy_id="test-policy",
             event_id="evt-123",
             status="rolled_back",
-            executed_at=datetime.utcnow() - timedelta(hours=2),
+            executed_at=_NOW - timedelta(hours=2),
             executed_by="admin@example.com",
             action="attach_deny_policy",
             target="arn:aws:iam::123456789012:role/test",
             diff={"before": [], "after": ["arn:aws:iam::123456789012:policy/deny"]},
-            ttl_expires_at=datetime.utcnow() + timedelta(hours=1),
-            rolled_back_at=datetime.utcnow(),
+            ttl_expires_at=_NOW + timedelta(hours=1),
+            rolled_back_at=_NOW,
         )
 
         result = audit_store.save_execution(execution)
@@ -124,6 +186,118 @@ class TestSaveExecution:
         assert retrieved.ttl_expires_at is not None
 
 
+class TestSaveExecutionsBatch:
+    """Test saving execution records in batches."""
+
+    def test_save_executions_batch(self, audit_store):
+        """Test that every execution in the batch is saved."""
+        executions = [
+            ActionExecution(
+                execution_id=f"exec-batch-{i}",
+                policy_id="test-policy",
+                event_id=f"evt-{i}",
+                status="executed",
+                executed_at=_NOW,
+                executed_by="system:auto",
+                action="attach_deny_policy",
+                target=f"arn:aws:iam::123456789012:role/test-{i}",
+            )
+            for i in range(30)  # More than one 25-item BatchWriteItem request
+        ]
+
+        assert audit_store.save_executions_batch(executions) is True
+
+        for execution in executions:
+            retrieved = audit_store.get_execution(execution.execution_id)
+            assert retrieved is not None
+            assert retrieved.target == execution.target
+
+    def test_save_executions_batch_empty(self, audit_store):
+        """Test that an empty batch is a no-op."""
+        assert audit_store.save_executions_batch([]) is True
+
+    def test_save_executions_batch_retries_unprocessed(
+        self, audit_store, sample_execution, monkeypatch
+    ):
+        """Test that UnprocessedItems are resent with exponential backoff."""
+        batch_write_item = audit_store.dynamodb.batch_write_item
+        calls = []
+
+        def throttled(**kwargs):
+            calls.append(kwargs)
+            if len(calls) < 3:
+                return {"UnprocessedItems": kwargs["RequestItems"]}
+            return batch_write_item(**kwargs)
+
+        sleeps = []
+        monkeypatch.setattr(audit_store.dynamodb, "batch_write_item", throttled)
+        monkeypatch.setattr("src.guardrails.audit_store.time.sleep", sleeps.append)
+
+        assert audit_store.save_executions_batch([sample_execution]) is True
+        assert sleeps == [0.05, 0.1]
+        assert audit_store.get_execution(sample_execution.execution_id) is not None
+
+    def test_save_executions_batch_unprocessed_gives_up(
+        self, audit_store, sample_execution, monkeypatch
+    ):
+        """Test that items still unprocessed after every attempt return False."""
+        sleeps = []
+        monkeypatch.setattr(
+            audit_store.dynamodb,
+            "batch_write_item",
+            lambda **kwargs: {"UnprocessedItems": kwargs["RequestItems"]},
+        )
+        monkeypatch.setattr("src.guardrails.audit_store.time.sleep", sleeps.append)
+
+        assert audit_store.save_executions_batch([sample_execution]) is False
+        assert sleeps == [0.05, 0.1, 0.2, 0.4]
+
+    def test_save_executions_batch_missing_table(self, mock_dynamodb, sample_execution):
+        """Test that a failed batch returns False."""
+        store = AuditStore(table_name="missing-table", region="us-east-1")
+
+        assert store.save_executions_batch([sample_execution]) is False
+
+
+class TestSaveExecutionsTransact:
+    """Test saving execution records transactionally."""
+
+    def test_save_executions_transact(self, audit_store):
+        """Test that every execution is saved, including across transactions."""
+        executions = [
+            ActionExecution(
+                execution_id=f"exec-txn-{i}",
+                policy_id="test-policy",
+                event_id=f"evt-{i}",
+                status="executed",
+                executed_at=_NOW,
+                executed_by="system:auto",
+                action="attach_deny_policy",
+                target=f"arn:aws:iam::123456789012:role/test-{i}",
+                diff={"after": [f"arn:aws:iam::123456789012:policy/deny-{i}"]},
+            )
+            for i in range(TRANSACT_WRITE_MAX_ITEMS + 5)  # Needs two transactions
+        ]
+
+        assert audit_store.save_executions_transact(executions) is True
+
+        for execution in (executions[0], executions[-1]):
+            retrieved = audit_store.get_execution(execution.execution_id)
+            assert retrieved is not None
+            assert retrieved.diff == execution.diff
+            assert retrieved.executed_at == execution.executed_at
+
+    def test_save_executions_transact_empty(self, audit_store):
+        """Test that an empty list is a no-op."""
+        assert audit_store.save_executions_transact([]) is True
+
+    def test_save_executions_transact_missing_table(self, mock_dynamodb, sample_execution):
+        """Test that a failed transaction returns False."""
+        store = AuditStore(table_name="missing-table", region="us-east-1")
+
+        assert store.save_executions_transact([sample_execution]) is False
+
+
 class TestGetExecution:
     """Test retrieving execution records."""
 
@@ -149,11 +323,11 @@ class TestGetExecution:
     def test_get_execution_preserves_datetime(self, audit_store):
         """Test that datetime fields are preserved correctly."""
         execution = ActionExecution(
-            execution_id=f"exec-{uuid4()}",
+            execution_id=f"exec-seq-{next(_ids)}",
             policy_id="test-policy",
             event_id="evt-123",
             status="executed",
-            executed_at=datetime(2024, 1, 15, 10, 30, 0),
+            executed_at=datetime(2024, 1, 15, 10, 30, 0, 123456),
             executed_by="test",
             action="attach_deny_policy",
             target="arn:aws:iam::123456789012:role/test",
@@ -165,9 +339,9 @@ class TestGetExecution:
         retrieved = audit_store.get_execution(execution.execution_id)
 
         assert retrieved is not None
-        # Compare timestamps (may have microsecond differences due to ISO format)
-        assert abs((retrieved.executed_at - execution.executed_at).total_seconds()) < 1
-        assert abs((retrieved.ttl_expires_at - execution.ttl_expires_at).total_seconds()) < 1
+        # ISO-8601 round-trips datetimes exactly, with or without microseconds
+        assert retrieved.executed_at == execution.executed_at
+        assert retrieved.ttl_expires_at == execution.ttl_expires_at
 
 
 class TestUpdateExecution:
@@ -179,10 +353,11 @@ class TestUpdateExecution:
         audit_store.save_execution(sample_execution)
 
         # Update status
-        sample_execution.status = "rolled_back"
-        sample_execution.rolled_back_at = datetime.utcnow()
+        updated = sample_execution.model_copy(
+            update={"status": "rolled_back", "rolled_back_at": _NOW}
+        )
 
-        result = audit_store.update_execution(sample_execution)
+        result = audit_store.update_execution(updated)
         assert result is True
 
         # Verify update
@@ -193,11 +368,11 @@ class TestUpdateExecution:
     def test_update_nonexistent_creates_new(self, audit_store):
         """Test that updating non-existent execution creates it."""
         execution = ActionExecution(
-            execution_id=f"exec-{uuid4()}",
+            execution_id=f"exec-seq-{next(_ids)}",
             policy_id="test-policy",
             event_id="evt-123",
             status="executed",
-            executed_at=datetime.utcnow(),
+            executed_at=_NOW,
             executed_by="test",
             action="notify_only",
             target="arn:aws:iam::123456789012:role/test",
@@ -216,56 +391,30 @@ class TestUpdateExecution:
 class TestQueryExecutionsByPolicy:
     """Test querying executions by policy."""
 
-    def test_query_executions_for_policy(self, audit_store):
-        """Test querying all executions for a policy."""
-        policy_id = "test-policy-123"
-
-        # Create multiple executions
-        for i in range(5):
-            execution = ActionExecution(
-                execution_id=f"exec-{i}",
-                policy_id=policy_id,
-                event_id=f"evt-{i}",
-                status="executed",
-                executed_at=datetime.utcnow() - timedelta(minutes=i),
-                executed_by="test",
-                action="attach_deny_policy",
-                target="arn:aws:iam::123456789012:role/test",
-                diff={},
-            )
-            audit_store.save_execution(execution)
+    @pytest.mark.parametrize(
+        ("limit", "expected"),
+        [(5, 5), (10, 10), (None, _SEEDED_COUNT)],
+        ids=["limit_5", "limit_10", "default_limit"],
+    )
+    def test_query_executions_for_policy(self, seeded_store, limit, expected):
+        """Test querying a policy's executions, newest first, up to the limit."""
+        kwargs = {} if limit is None else {"limit": limit}
 
-        # Query
-        results = audit_store.query_executions_by_policy(policy_id)
+        results = seeded_store.query_executions_by_policy(_SEEDED_POLICY, **kwargs)
 
-        assert len(results) == 5
-        # Should be sorted by executed_at descending (newest first)
-        assert results[0].execution_id == "exec-0"
-        assert results[4].execution_id == "exec-4"
+        # Sorted by executed_at descending (newest first)
+        assert [e.execution_id for e in results] == [f"exec-{i}" for i in range(expected)]
 
-    def test_query_executions_with_limit(self, audit_store):
-        """Test querying with limit."""
-        policy_id = "test-policy-456"
+    def test_query_execution_statuses_for_policy(self, seeded_store):
+        """Test querying only execution IDs and statuses for a policy."""
+        statuses = seeded_store.query_execution_statuses_by_policy(_SEEDED_POLICY, limit=3)
 
-        # Create 10 executions
-        for i in range(10):
-            execution = ActionExecution(
-                execution_id=f"exec-{i}",
-                policy_id=policy_id,
-                event_id=f"evt-{i}",
-                status="executed",
-                executed_at=datetime.utcnow(),
-                executed_by="test",
-                action="notify_only",
-                target="arn:aws:iam::123456789012:role/test",
-                diff={},
-            )
-            audit_store.save_execution(execution)
+        assert statuses == {"exec-0": "executed", "exec-1": "executed", "exec-2": "executed"}
+        assert list(statuses) == ["exec-0", "exec-1", "exec-2"]  # Newest first
 
-        # Query with limit
-        results = audit_store.query_executions_by_policy(policy_id, limit=5)
-
-        assert len(results) <= 5
+    def test_query_statuses_nonexistent_policy(self, audit_store):
+        """Test querying statuses for policy with no executions."""
+        assert audit_store.query_execution_statuses_by_policy("nonexistent-policy") == {}
 
     def test_query_nonexistent_policy(self, audit_store):
         """Test querying for policy with no executions."""
@@ -278,7 +427,7 @@ class TestQueryExpiredExecutions:
 
     def test_query_expired_executions(self, audit_store):
         """Test finding executions with expired TTL."""
-        current_time = datetime.utcnow()
+        current_time = _NOW
 
         # Create expired execution
         expired_execution = ActionExecution(
@@ -293,7 +442,6 @@ class TestQueryExpiredExecutions:
             diff={},
             ttl_expires_at=current_time - timedelta(hours=1),  # Expired 1 hour ago
         )
-        audit_store.save_execution(expired_execution)
 
         # Create not-yet-expired execution
         active_execution = ActionExecution(
@@ -308,7 +456,7 @@ class TestQueryExpiredExecutions:
             diff={},
             ttl_expires_at=current_time + timedelta(hours=1),  # Expires in 1 hour
         )
-        audit_store.save_execution(active_execution)
+        audit_store.save_executions_batch([expired_execution, active_execution])
 
         # Query expired
         results = audit_store.query_expired_executions(current_time)
@@ -320,7 +468,7 @@ class TestQueryExpiredExecutions:
 
     def test_query_expired_ignores_rolled_back(self, audit_store):
         """Test that query ignores already rolled-back executions."""
-        current_time = datetime.utcnow()
+        current_time = _NOW
 
         # Create expired but already rolled-back execution
         rolled_back_execution = ActionExecution(
@@ -345,48 +493,84 @@ class TestQueryExpiredExecutions:
         execution_ids = [e.execution_id for e in results]
         assert "exec-rolled-back" not in execution_ids
 
+    def test_query_expired_without_ttl_index(self, moto_session, sample_execution):
+        """Test the scan fallback on a table created before the TTL index."""
+        boto3.client("dynamodb", region_name="us-east-1").create_table(
+            TableName="legacy-audit",
+            KeySchema=[{"AttributeName": "execution_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "execution_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        store = AuditStore(table_name="legacy-audit", region="us-east-1")
+        store.save_execution(sample_execution)
+
+        results = store.query_expired_executions(sample_execution.ttl_expires_at)
+
+        assert [e.execution_id for e in results] == [sample_execution.execution_id]
+
+    def test_query_expired_without_ttl_index_follows_pages(
+        self, moto_session, sample_execution, monkeypatch
+    ):
+        """Test that the scan fallback reads past the first page of results."""
+        boto3.client("dynamodb", region_name="us-east-1").create_table(
+            TableName="legacy-audit-paged",
+            KeySchema=[{"AttributeName": "execution_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "execution_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        store = AuditStore(table_name="legacy-audit-paged", region="us-east-1")
+        expired = [
+            sample_execution.model_copy(update={"execution_id": f"exec-seq-{next(_ids)}"})
+            for _ in range(3)
+        ]
+        store.save_executions_batch(expired)
+
+        # One item per page stands in for a table larger than 1 MB
+        scan = store.table.scan
+        monkeypatch.setattr(store.table, "scan", lambda **kwargs: scan(Limit=1, **kwargs))
+
+        results = store.query_expired_executions(sample_execution.ttl_expires_at)
+
+        assert sorted(e.execution_id for e in results) == sorted(e.execution_id for e in expired)
+
 
 class TestListRecentExecutions:
     """Test listing recent executions."""
 
-    def test_list_recent_executions(self, audit_store):
-        """Test listing recent executions."""
-        # Create multiple executions
-        for i in range(5):
-            execution = ActionExecution(
-                execution_id=f"exec-{i}",
-                policy_id=f"policy-{i}",
-                event_id=f"evt-{i}",
-                status="executed",
-                executed_at=datetime.utcnow() - timedelta(minutes=i),
-                executed_by="test",
-                action="attach_deny_policy",
-                target="arn:aws:iam::123456789012:role/test",
-                diff={},
-            )
-            audit_store.save_execution(execution)
+    @pytest.mark.parametrize(
+        ("limit", "expected"),
+        [(5, 5), (10, 10), (None, _SEEDED_COUNT)],
+        ids=["limit_5", "limit_10", "default_limit"],
+    )
+    def test_list_recent_executions(self, seeded_store, limit, expected):
+        """Test listing recent executions up to the limit."""
+        kwargs = {} if limit is None else {"limit": limit}
 
-        results = audit_store.list_recent_executions(limit=10)
+        results = seeded_store.list_recent_executions(**kwargs)
 
-        assert len(results) == 5
+        assert len(results) == expected
+        assert results == sorted(results, key=lambda e: e.executed_at, reverse=True)
 
     def test_list_recent_with_status_filter(self, audit_store):
         """Test listing recent executions with status filter."""
         # Create executions with different statuses
         statuses = ["planned", "executed", "executed", "failed", "rolled_back"]
-        for i, status in enumerate(statuses):
-            execution = ActionExecution(
-                execution_id=f"exec-{i}",
-                policy_id="test-policy",
-                event_id=f"evt-{i}",
-                status=status,
-                executed_at=datetime.utcnow() if status != "planned" else None,
-                executed_by="test",
-                action="attach_deny_policy",
-                target="arn:aws:iam::123456789012:role/test",
-                diff={},
-            )
-            audit_store.save_execution(execution)
+        audit_store.save_executions_batch(
+            [
+                ActionExecution(
+                    execution_id=f"exec-{i}",
+                    policy_id="test-policy",
+                    event_id=f"evt-{i}",
+                    status=status,
+                    executed_at=_NOW if status != "planned" else None,
+                    executed_by="test",
+                    action="attach_deny_policy",
+                    target="arn:aws:iam::123456789012:role/test",
+                    diff={},
+                )
+                for i, status in enumerate(statuses)
+            ]
+        )
 
         # Query only executed
         results = audit_store.list_recent_executions(limit=10, status="executed")
@@ -394,51 +578,27 @@ class TestListRecentExecutions:
         assert len(results) == 2
         assert all(e.status == "executed" for e in results)
 
-    def test_list_recent_respects_limit(self, audit_store):
-        """Test that limit is respected."""
-        # Create 20 executions
-        for i in range(20):
-            execution = ActionExecution(
-                execution_id=f"exec-{i}",
-                policy_id="test-policy",
-                event_id=f"evt-{i}",
-                status="executed",
-                executed_at=datetime.utcnow(),
-                executed_by="test",
-                action="notify_only",
-                target="arn:aws:iam::123456789012:role/test",
-                diff={},
-            )
-            audit_store.save_execution(execution)
-
-        results = audit_store.list_recent_executions(limit=5)
-
-        assert len(results) == 5
-
 
 class TestCreateAuditTable:
     """Test table creation."""
 
-    def test_create_table_success(self):
+    def test_create_table_success(self, ddb_resource):
         """Test successful table creation."""
-        with mock_aws():
-            result = create_audit_table(table_name="new-audit-table", region="us-east-1")
-            assert result is True
+        result = create_audit_table(table_name="new-audit-table", region="us-east-1")
+        assert result is True
 
-            # Verify table exists
-            dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
-            table = dynamodb.Table("new-audit-table")
-            assert table.table_status in ["ACTIVE", "CREATING"]
+        # Verify table exists
+        table = ddb_resource.Table("new-audit-table")
+        assert table.table_status in ["ACTIVE", "CREATING"]
 
-    def test_create_table_already_exists(self):
+    def test_create_table_already_exists(self, moto_session):
         """Test creating table that already exists."""
-        with mock_aws():
-            # Create first time
-            create_audit_table(table_name="existing-table", region="us-east-1")
+        # Create first time
+        create_audit_table(table_name="existing-table", region="us-east-1")
 
-            # Try to create again
-            result = create_audit_table(table_name="existing-table", region="us-east-1")
-            assert result is True  # Should succeed (idempotent)
+        # Try to create again
+        result = create_audit_table(table_name="existing-table", region="us-east-1")
+        assert result is True  # Should succeed (idempotent)
 
 
 class TestExecutionToItem:
@@ -2,7 +2,8 @@
 
 import json
 import os
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import DEFAULT, MagicMock, patch
 
 import pytest
 from moto import mock_aws
@@ -16,63 +17,75 @@ from src.guardrails.handlers.budgets_event import (
     parse_event,
 )
 from src.guardrails.models import ActionPlan, CostEvent, PolicyAction
+from src.guardrails.policy_engine import PolicyIndex
+
+
+# Budget notification as SNS delivers it (JSON string), encoded once at import
+_SNS_MESSAGE_JSON = json.dumps(
+    {
+        "budgetName": "test-budget",
+        "calculatedSpend": {"actualSpend": {"amount": 300.0, "unit": "USD"}},
+        "notificationArn": "arn:aws:budgets::123456789012:budget/test",
+    }
+)
+
+
+# SNS budget notification; cases override calculatedSpend or drop keys
+_BASE_NOTIFICATION = {
+    "budgetName": "monthly-budget",
+    "notificationType": "ACTUAL",
+    "thresholdType": "PERCENTAGE",
+    "comparisonOperator": "GREATER_THAN",
+    "threshold": 80,
+    "calculatedSpend": {"actualSpend": {"amount": 250.0, "unit": "USD"}},
+    "notificationArn": "arn:aws:budgets::123456789012:budget/monthly-budget",
+    "time": "2024-01-15T10:30:00Z",
+}
+
+
+def _with_spend(amount, unit="USD") -> dict:
+    """_BASE_NOTIFICATION with a different actual spend."""
+    return {
+        **_BASE_NOTIFICATION,
+        "calculatedSpend": {"actualSpend": {"amount": amount, "unit": unit}},
+    }
 
 
 class TestParseBudgetsNotification:
     """Test parsing AWS Budgets notifications (SNS format)."""
 
-    def test_valid_notification(self):
-        """Test parsing valid budget notification."""
-        notification = {
-            "budgetName": "monthly-budget",
-            "notificationType": "ACTUAL",
-            "thresholdType": "PERCENTAGE",
-            "comparisonOperator": "GREATER_THAN",
-            "threshold": 80,
-            "calculatedSpend": {"actualSpend": {"amount": 250.0, "unit": "USD"}},
-            "notificationArn": "arn:aws:budgets::123456789012:budget/monthly-budget",
-            "time": "2024-01-15T10:30:00Z",
-        }
-
-        event = parse_budgets_notification(notification)
+    @pytest.mark.parametrize(
+        ("amount", "unit"),
+        [(250.0, "USD"), (500.0, "EUR")],
+        ids=["usd", "non_usd_currency"],
+    )
+    def test_valid_notification(self, amount, unit):
+        """Test parsing valid budget notifications."""
+        event = parse_budgets_notification(_with_spend(amount, unit))
 
         assert event.source == "budgets"
         assert event.account_id == "123456789012"
-        assert event.amount == 250.0
+        assert event.amount == amount
+        assert event.details["currency"] == unit
         assert event.details["budget_name"] == "monthly-budget"
         assert event.details["threshold"] == 80
 
-    def test_notification_without_budget_name(self):
-        """Test parsing notification without budget name."""
-        notification = {"calculatedSpend": {"actualSpend": {"amount": 100.0, "unit": "USD"}}}
-
-        with pytest.raises(ValueError, match="Missing budgetName"):
-            parse_budgets_notification(notification)
-
-    def test_notification_with_zero_amount(self):
-        """Test parsing notification with zero amount."""
-        notification = {
-            "budgetName": "test-budget",
-            "calculatedSpend": {"actualSpend": {"amount": 0, "unit": "USD"}},
-            "notificationArn": "arn:aws:budgets::123456789012:budget/test",
-        }
-
-        with pytest.raises(ValueError, match="Invalid amount"):
+    @pytest.mark.parametrize(
+        ("notification", "error"),
+        [
+            (
+                {"calculatedSpend": {"actualSpend": {"amount": 100.0, "unit": "USD"}}},
+                "Missing budgetName",
+            ),
+            (_with_spend(0), "Invalid amount"),
+        ],
+        ids=["without_budget_name", "zero_amount"],
+    )
+    def test_invalid_notification(self, notification, error):
+        """Test that invalid notifications are rejected."""
+        with pytest.raises(ValueError, match=error):
             parse_budgets_notification(notification)
 
-    def test_notification_with_different_currency(self):
-        """Test parsing notification with non-USD currency."""
-        notification = {
-            "budgetName": "eur-budget",
-            "calculatedSpend": {"actualSpend": {"amount": 500.0, "unit": "EUR"}},
-            "notificationArn": "arn:aws:budgets::123456789012:budget/eur-budget",
-        }
-
-        event = parse_budgets_notification(notification)
-
-        assert event.amount == 500.0
-        assert event.details["currency"] == "EUR"
-
 
 class TestParseBudgetsEventBridge:
     """Test parsing AWS Budgets EventBridge events."""
@@ -105,28 +118,26 @@ class TestParseBudgetsEventBridge:
         assert cost_event.details["budget_name"] == "monthly-budget"
         assert cost_event.details["region"] == "us-east-1"
 
-    def test_eventbridge_without_budget_name(self):
-        """Test EventBridge event without budget name."""
-        event = {
-            "account": "123456789012",
-            "detail": {"calculatedSpend": {"actualSpend": {"amount": 100.0}}},
-        }
-
-        with pytest.raises(ValueError, match="Missing budgetName"):
-            parse_budgets_eventbridge(event)
-
-    def test_eventbridge_with_invalid_account(self):
-        """Test EventBridge event with invalid account ID."""
-        event = {
-            "account": "invalid",
-            "detail": {
-                "budgetName": "test",
-                "calculatedSpend": {"actualSpend": {"amount": 100.0}},
-            },
-        }
-
-        with pytest.raises(ValueError, match="Invalid account ID"):
-            parse_budgets_eventbridge(event)
+    @pytest.mark.parametrize(
+        ("account", "detail", "error"),
+        [
+            (
+                "123456789012",
+                {"calculatedSpend": {"actualSpend": {"amount": 100.0}}},
+                "Missing budgetName",
+            ),
+            (
+                "invalid",
+                {"budgetName": "test", "calculatedSpend": {"actualSpend": {"amount": 100.0}}},
+                "Invalid account ID",
+            ),
+        ],
+        ids=["without_budget_name", "invalid_account"],
+    )
+    def test_invalid_eventbridge_event(self, account, detail, error):
+        """Test that invalid EventBridge events are rejected."""
+        with pytest.raises(ValueError, match=error):
+            parse_budgets_eventbridge({"account": account, "detail": detail})
 
 
 class TestExtractAccountId:
@@ -172,17 +183,7 @@ class TestParseEvent:
             "Records": [
                 {
                     "EventSource": "aws:sns",
-                    "Sns": {
-                        "Message": json.dumps(
-                            {
-                                "budgetName": "test-budget",
-                                "calculatedSpend": {
-                                    "actualSpend": {"amount": 300.0, "unit": "USD"}
-                                },
-                                "notificationArn": "arn:aws:budgets::123456789012:budget/test",
-                            }
-                        )
-                    },
+                    "Sns": {"Message": _SNS_MESSAGE_JSON},
                 }
             ]
         }
@@ -230,48 +231,64 @@ class TestParseEvent:
             parse_event(unsupported_event)
 
 
+@pytest.fixture
+def slack_env(monkeypatch):
+    """Give the handler a Slack webhook URL."""
+    monkeypatch.setenv("SLACK_WEBHOOK_URL", "https://hooks.slack.com/services/xxx")
+
+
+@pytest.fixture
+def mock_notifier(monkeypatch):
+    """Replace the handler's SlackNotifier; returns the instance it will build."""
+    notifier = MagicMock()
+    monkeypatch.setattr(
+        "src.guardrails.handlers.budgets_event.SlackNotifier", MagicMock(return_value=notifier)
+    )
+    return notifier
+
+
+# Cost event shared by the execute_action_plan tests; the handler only reads it
+_COST_EVENT = CostEvent(
+    event_id="evt-123",
+    source="budgets",
+    account_id="123456789012",
+    amount=250.0,
+    time_window="2024-01-15",
+    details={},
+)
+
+# Dry-run plan shared by tests that never set DRY_RUN (which rewrites plan.mode)
+_DRY_RUN_PLAN = ActionPlan(
+    matched=True,
+    matched_policy_id="test-policy",
+    mode="dry_run",
+    actions=[PolicyAction(type="notify_only")],
+    ttl_minutes=0,
+    target_principals=[],
+)
+
+
 class TestExecuteActionPlan:
     """Test action plan execution."""
 
-    def test_execute_dry_run(self):
+    def test_execute_dry_run(self, slack_env, mock_notifier):
         """Test executing dry-run mode."""
-        event = CostEvent(
-            event_id="evt-123",
-            source="budgets",
-            account_id="123456789012",
-            amount=250.0,
-            time_window="2024-01-15",
-            details={},
-        )
+        mock_notifier.send_dry_run_alert.return_value = True
 
-        plan = ActionPlan(
-            matched=True,
-            matched_policy_id="test-policy",
-            mode="dry_run",
-            actions=[PolicyAction(type="notify_only")],
-            ttl_minutes=0,
-            target_principals=[],
-        )
-
-        with patch.dict(os.environ, {"SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/xxx"}):
-            with patch(
-                "src.guardrails.handlers.budgets_event.SlackNotifier"
-            ) as mock_notifier_class:
-                mock_notifier = MagicMock()
-                mock_notifier.send_dry_run_alert.return_value = True
-                mock_notifier_class.return_value = mock_notifier
+        result = execute_action_plan(_COST_EVENT, _DRY_RUN_PLAN)
 
-                result = execute_action_plan(event, plan)
-
-                assert result["notification_sent"] is True
-                assert result["action"] == "none"
-                mock_notifier.send_dry_run_alert.assert_called_once()
+        assert result["notification_sent"] is True
+        assert result["action"] == "none"
+        mock_notifier.send_dry_run_alert.assert_called_once()
 
     @mock_aws
-    def test_execute_manual_mode(self):
+    def test_execute_manual_mode(self, slack_env, mock_notifier, monkeypatch):
         """Test executing manual approval mode."""
         import boto3
 
+        monkeypatch.setenv("DYNAMODB_TABLE_NAME", "autoguardrails-audit")
+        monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
         # Setup DynamoDB
         dynamodb = boto3.client("dynamodb", region_name="us-east-1")
         dynamodb.create_table(
@@ -302,15 +319,6 @@ class TestExecuteActionPlan:
             AssumeRolePolicyDocument='{"Version": "2012-10-17", "Statement": []}',
         )
 
-        event = CostEvent(
-            event_id="evt-123",
-            source="budgets",
-            account_id="123456789012",
-            amount=500.0,
-            time_window="2024-01-15",
-            details={},
-        )
-
         plan = ActionPlan(
             matched=True,
             matched_policy_id="manual-policy",
@@ -319,39 +327,18 @@ class TestExecuteActionPlan:
             ttl_minutes=180,
             target_principals=["arn:aws:iam::123456789012:role/test"],
         )
+        mock_notifier.send_approval_request.return_value = True
 
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/xxx",
-                "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
-                "AWS_DEFAULT_REGION": "us-east-1",
-            },
-        ):
-            with patch(
-                "src.guardrails.handlers.budgets_event.SlackNotifier"
-            ) as mock_notifier_class:
-                mock_notifier = MagicMock()
-                mock_notifier.send_approval_request.return_value = True
-                mock_notifier_class.return_value = mock_notifier
-
-                result = execute_action_plan(event, plan)
+        result = execute_action_plan(_COST_EVENT, plan)
 
-                assert result["notification_sent"] is True
-                assert result["action"] == "approval_requested"
-                assert "execution_id" in result
-                mock_notifier.send_approval_request.assert_called_once()
+        assert result["notification_sent"] is True
+        assert result["action"] == "approval_requested"
+        assert "execution_id" in result
+        mock_notifier.send_approval_request.assert_called_once()
 
-    def test_execute_auto_mode_executes_immediately(self):
+    def test_execute_auto_mode_executes_immediately(self, slack_env, mock_notifier, monkeypatch):
         """Test executing auto mode (implemented in Phase 3)."""
-        event = CostEvent(
-            event_id="evt-123",
-            source="budgets",
-            account_id="123456789012",
-            amount=1000.0,
-            time_window="2024-01-15",
-            details={},
-        )
+        monkeypatch.setenv("DYNAMODB_TABLE_NAME", "autoguardrails-audit")
 
         plan = ActionPlan(
             matched=True,
@@ -362,71 +349,90 @@ class TestExecuteActionPlan:
             target_principals=["arn:aws:iam::123456789012:role/test"],
         )
 
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/xxx",
-                "DYNAMODB_TABLE_NAME": "autoguardrails-audit",
-            },
-        ):
-            with patch(
-                "src.guardrails.handlers.budgets_event.SlackNotifier"
-            ) as mock_notifier_class:
-                with patch("src.guardrails.executor_iam.IAMExecutor") as mock_executor_class:
-                    with patch("src.guardrails.audit_store.AuditStore") as mock_audit_class:
-                        # Setup mocks
-                        mock_notifier = MagicMock()
-                        mock_notifier.send_execution_confirmation.return_value = True
-                        mock_notifier_class.return_value = mock_notifier
-
-                        mock_execution = MagicMock()
-                        mock_execution.execution_id = "exec-123"
-                        mock_execution.ttl_expires_at = None
-
-                        mock_executor = MagicMock()
-                        mock_executor.execute_action_plan.return_value = [mock_execution]
-                        mock_executor_class.return_value = mock_executor
-
-                        mock_audit = MagicMock()
-                        mock_audit_class.return_value = mock_audit
-
-                        result = execute_action_plan(event, plan)
-
-                        # Should execute immediately
-                        assert result["action"] == "executed"
-                        assert result["execution_id"] == "exec-123"
-                        assert "executions_created" in result
-                        mock_executor.execute_action_plan.assert_called_once()
-                        mock_audit.save_execution.assert_called_once()
+        # Setup mocks
+        mock_notifier.send_execution_confirmation.return_value = True
 
-    def test_execute_without_slack_webhook(self):
-        """Test execution fails without SLACK_WEBHOOK_URL."""
-        event = CostEvent(
-            event_id="evt-123",
-            source="budgets",
-            account_id="123456789012",
-            amount=250.0,
-            time_window="2024-01-15",
-            details={},
+        mock_execution = SimpleNamespace(execution_id="exec-123", ttl_expires_at=None)
+
+        mock_executor = MagicMock()
+        mock_executor.execute_action_plan.return_value = [mock_execution]
+        monkeypatch.setattr(
+            "src.guardrails.executor_iam.IAMExecutor", MagicMock(return_value=mock_executor)
         )
 
+        mock_audit = MagicMock()
+        monkeypatch.setattr(
+            "src.guardrails.audit_store.AuditStore", MagicMock(return_value=mock_audit)
+        )
+
+        result = execute_action_plan(_COST_EVENT, plan)
+
+        # Should execute immediately
+        assert result["action"] == "executed"
+        assert result["execution_id"] == "exec-123"
+        assert "executions_created" in result
+        mock_executor.execute_action_plan.assert_called_once()
+        mock_audit.save_executions_batch.assert_called_once_with([mock_execution])
+
+    def test_execute_auto_mode_falls_back_to_single_saves(
+        self, slack_env, mock_notifier, monkeypatch, caplog
+    ):
+        """Test that a failed batch save retries each record on its own."""
         plan = ActionPlan(
             matched=True,
-            matched_policy_id="test-policy",
-            mode="dry_run",
-            actions=[PolicyAction(type="notify_only")],
-            ttl_minutes=0,
-            target_principals=[],
+            matched_policy_id="auto-policy",
+            mode="auto",
+            actions=[PolicyAction(type="attach_deny_policy", deny=["ec2:*"])],
+            ttl_minutes=180,
+            target_principals=[
+                "arn:aws:iam::123456789012:role/test",
+                "arn:aws:iam::123456789012:user/test",
+            ],
+        )
+        executions = [
+            SimpleNamespace(execution_id="exec-1", ttl_expires_at=None),
+            SimpleNamespace(execution_id="exec-2", ttl_expires_at=None),
+        ]
+
+        mock_executor = MagicMock()
+        mock_executor.execute_action_plan.return_value = executions
+        monkeypatch.setattr(
+            "src.guardrails.executor_iam.IAMExecutor", MagicMock(return_value=mock_executor)
         )
 
+        mock_audit = MagicMock()
+        mock_audit.save_executions_batch.return_value = False
+        mock_audit.save_execution.side_effect = [True, False]
+        monkeypatch.setattr(
+            "src.guardrails.audit_store.AuditStore", MagicMock(return_value=mock_audit)
+        )
+
+        result = execute_action_plan(_COST_EVENT, plan)
+
+        assert result["action"] == "executed"
+        assert mock_audit.save_execution.call_args_list == [
+            ((execution,),) for execution in executions
+        ]
+        assert "audit records for ['exec-2']" in caplog.text
+
+    def test_execute_without_slack_webhook(self):
+        """Test execution fails without SLACK_WEBHOOK_URL."""
         with patch.dict(os.environ, {}, clear=True):
             with pytest.raises(ValueError, match="SLACK_WEBHOOK_URL"):
-                execute_action_plan(event, plan)
+                execute_action_plan(_COST_EVENT, _DRY_RUN_PLAN)
 
 
 class TestLambdaHandler:
     """Test Lambda handler integration."""
 
+    @pytest.fixture(autouse=True)
+    def policy_loader(self, request, monkeypatch):
+        """Stub policy discovery; parametrize indirectly to change the policies."""
+        monkeypatch.setattr("src.guardrails.handlers.budgets_event._policy_indexes", {})
+        with patch("src.guardrails.handlers.budgets_event.load_policies_from_directory") as m:
+            m.return_value = getattr(request, "param", [MagicMock()])
+            yield m
+
     def test_handler_success_dry_run(self):
         """Test handler with successful dry-run execution."""
         event = {
@@ -435,50 +441,35 @@ class TestLambdaHandler:
             "notificationArn": "arn:aws:budgets::123456789012:budget/test",
         }
 
-        context = MagicMock()
+        context = SimpleNamespace(aws_request_id="test")
 
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/xxx",
-                "POLICIES_PATH": "policies",
-            },
+        env = {
+            "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/xxx",
+            "POLICIES_PATH": "policies",
+        }
+        with (
+            patch.dict(os.environ, env),
+            patch.multiple(
+                "src.guardrails.handlers.budgets_event",
+                PolicyEngine=DEFAULT,
+                execute_action_plan=DEFAULT,
+            ) as mocks,
         ):
-            with patch(
-                "src.guardrails.handlers.budgets_event.load_policies_from_directory"
-            ) as mock_load:
-                with patch(
-                    "src.guardrails.handlers.budgets_event.PolicyEngine"
-                ) as mock_engine_class:
-                    with patch(
-                        "src.guardrails.handlers.budgets_event.execute_action_plan"
-                    ) as mock_execute:
-                        # Mock policy loading
-                        mock_load.return_value = [MagicMock()]
-
-                        # Mock policy engine
-                        mock_engine = MagicMock()
-                        mock_plan = ActionPlan(
-                            matched=True,
-                            matched_policy_id="test-policy",
-                            mode="dry_run",
-                            actions=[PolicyAction(type="notify_only")],
-                            ttl_minutes=0,
-                            target_principals=[],
-                        )
-                        mock_engine.evaluate.return_value = mock_plan
-                        mock_engine_class.return_value = mock_engine
-
-                        # Mock execution result
-                        mock_execute.return_value = {"notification_sent": True, "action": "none"}
-
-                        response = lambda_handler(event, context)
-
-                        assert response["statusCode"] == 200
-                        body = json.loads(response["body"])
-                        assert body["status"] == "success"
-                        assert body["mode"] == "dry_run"
+            # Mock policy evaluation and execution result
+            mocks["PolicyEngine"].return_value.evaluate.return_value = _DRY_RUN_PLAN
+            mocks["execute_action_plan"].return_value = {
+                "notification_sent": True,
+                "action": "none",
+            }
+
+            response = lambda_handler(event, context)
 
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        assert body["status"] == "success"
+        assert body["mode"] == "dry_run"
+
+    @pytest.mark.parametrize("policy_loader", [[]], indirect=True)
     def test_handler_no_policies(self):
         """Test handler with no policies loaded."""
         event = {
@@ -487,18 +478,13 @@ class TestLambdaHandler:
             "notificationArn": "arn:aws:budgets::123456789012:budget/test",
         }
 
-        context = MagicMock()
+        context = SimpleNamespace(aws_request_id="test")
 
         with patch.dict(os.environ, {"POLICIES_PATH": "policies"}):
-            with patch(
-                "src.guardrails.handlers.budgets_event.load_policies_from_directory"
-            ) as mock_load:
-                mock_load.return_value = []
-
-                response = lambda_handler(event, context)
+            response = lambda_handler(event, context)
 
-                assert response["statusCode"] == 200
-                assert response["body"] == "no_policies"
+        assert response["statusCode"] == 200
+        assert response["body"] == "no_policies"
 
     def test_handler_no_match(self):
         """Test handler with no policy match."""
@@ -508,33 +494,28 @@ class TestLambdaHandler:
             "notificationArn": "arn:aws:budgets::123456789012:budget/test",
         }
 
-        context = MagicMock()
+        context = SimpleNamespace(aws_request_id="test")
 
-        with patch.dict(os.environ, {"POLICIES_PATH": "policies"}):
-            with patch(
-                "src.guardrails.handlers.budgets_event.load_policies_from_directory"
-            ) as mock_load:
-                with patch(
-                    "src.guardrails.handlers.budgets_event.PolicyEngine"
-                ) as mock_engine_class:
-                    mock_load.return_value = [MagicMock()]
-
-                    mock_engine = MagicMock()
-                    mock_plan = ActionPlan(
-                        matched=False,
-                        matched_policy_id=None,
-                        mode=None,
-                        actions=[],
-                        ttl_minutes=None,
-                        target_principals=[],
-                    )
-                    mock_engine.evaluate.return_value = mock_plan
-                    mock_engine_class.return_value = mock_engine
-
-                    response = lambda_handler(event, context)
-
-                    assert response["statusCode"] == 200
-                    assert response["body"] == "no_match"
+        with (
+            patch.dict(os.environ, {"POLICIES_PATH": "policies"}),
+            patch.multiple(
+                "src.guardrails.handlers.budgets_event",
+                PolicyEngine=DEFAULT,
+            ) as mocks,
+        ):
+            mocks["PolicyEngine"].return_value.evaluate.return_value = ActionPlan(
+                matched=False,
+                matched_policy_id=None,
+                mode=None,
+                actions=[],
+                ttl_minutes=None,
+                target_principals=[],
+            )
+
+            response = lambda_handler(event, context)
+
+        assert response["statusCode"] == 200
+        assert response["body"] == "no_match"
 
     def test_handler_global_dry_run_override(self):
         """Test handler with global DRY_RUN override."""
@@ -544,54 +525,69 @@ class TestLambdaHandler:
             "notificationArn": "arn:aws:budgets::123456789012:budget/test",
         }
 
-        context = MagicMock()
+        context = SimpleNamespace(aws_request_id="test")
 
-        with patch.dict(
-            os.environ,
-            {
-                "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/xxx",
-                "POLICIES_PATH": "policies",
-                "DRY_RUN": "true",
-            },
+        env = {
+            "SLACK_WEBHOOK_URL": "https://hooks.slack.com/services/xxx",
+            "POLICIES_PATH": "policies",
+            "DRY_RUN": "true",
+        }
+        with (
+            patch.dict(os.environ, env),
+            patch.multiple(
+                "src.guardrails.handlers.budgets_event",
+                PolicyEngine=DEFAULT,
+                execute_action_plan=DEFAULT,
+            ) as mocks,
         ):
-            with patch(
-                "src.guardrails.handlers.budgets_event.load_policies_from_directory"
-            ) as mock_load:
-                with patch(
-                    "src.guardrails.handlers.budgets_event.PolicyEngine"
-                ) as mock_engine_class:
-                    with patch(
-                        "src.guardrails.handlers.budgets_event.execute_action_plan"
-                    ) as mock_execute:
-                        mock_load.return_value = [MagicMock()]
-
-                        mock_engine = MagicMock()
-                        mock_plan = ActionPlan(
-                            matched=True,
-                            matched_policy_id="auto-policy",
-                            mode="auto",  # Should be overridden
-                            actions=[PolicyAction(type="attach_deny_policy", deny=["ec2:*"])],
-                            ttl_minutes=180,
-                            target_principals=["arn:aws:iam::123456789012:role/test"],
-                        )
-                        mock_engine.evaluate.return_value = mock_plan
-                        mock_engine_class.return_value = mock_engine
-
-                        # Mock execution result
-                        mock_execute.return_value = {"notification_sent": True, "action": "none"}
-
-                        response = lambda_handler(event, context)
-
-                        assert response["statusCode"] == 200
-                        body = json.loads(response["body"])
-                        # Mode should be overridden to dry_run
-                        assert body["mode"] == "dry_run"
+            mocks["PolicyEngine"].return_value.evaluate.return_value = ActionPlan(
+                matched=True,
+                matched_policy_id="auto-policy",
+                mode="auto",  # Should be overridden
+                actions=[PolicyAction(type="attach_deny_policy", deny=["ec2:*"])],
+                ttl_minutes=180,
+                target_principals=["arn:aws:iam::123456789012:role/test"],
+            )
+            mocks["execute_action_plan"].return_value = {
+                "notification_sent": True,
+                "action": "none",
+            }
+
+            response = lambda_handler(event, context)
+
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        # Mode should be overridden to dry_run
+        assert body["mode"] == "dry_run"
+
+    def test_handler_reuses_policy_index(self, policy_loader):
+        """Test that warm invocations reuse the policy index instead of rebuilding it."""
+        event = {
+            "budgetName": "test-budget",
+            "calculatedSpend": {"actualSpend": {"amount": 50.0, "unit": "USD"}},
+            "notificationArn": "arn:aws:budgets::123456789012:budget/test",
+        }
+
+        context = SimpleNamespace(aws_request_id="test")
+
+        with (
+            patch.dict(os.environ, {"POLICIES_PATH": "policies"}),
+            patch(
+                "src.guardrails.handlers.budgets_event.PolicyIndex", wraps=PolicyIndex
+            ) as index_cls,
+        ):
+            first = lambda_handler(event, context)
+            second = lambda_handler(event, context)
+
+        assert first == second == {"statusCode": 200, "body": "no_match"}
+        policy_loader.assert_called_once_with("policies")
+        index_cls.assert_called_once()
 
     def test_handler_error(self):
         """Test handler with error."""
         event = {"invalid": "event"}
 
-        context = MagicMock()
+        context = SimpleNamespace(aws_request_id="test")
 
         with patch.dict(os.environ, {"POLICIES_PATH": "policies"}):
             response = lambda_handler(event, context)
@@ -599,3 +595,27 @@ class TestLambdaHandler:
             assert response["statusCode"] == 500
             body = json.loads(response["body"])
             assert body["status"] == "error"
+
+
+class TestColdStartImports:
+    """Test that heavy optional dependencies are not imported with the handler."""
+
+    def test_handler_import_defers_yaml_and_requests(self):
+        """Importing the handler should not import PyYAML or requests."""
+        import subprocess
+        import sys
+        from pathlib import Path
+
+        code = (
+            "import sys; import src.guardrails.handlers.budgets_event; "
+            "print('yaml' in sys.modules, 'requests' in sys.modules)"
+        )
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).resolve().parents[2],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert result.stdout.strip() == "False False"
@@ -204,6 +204,77 @@ class TestPolicyMatch:
         match = PolicyMatch(source=["budgets"], account_ids=["123456789012"], min_amount_usd=100.0)
         assert match.services is None
 
+    def test_prefilter(self):
+        """Test prefilter checks source, account ID and minimum amount."""
+        match = PolicyMatch(source=["budgets"], account_ids=["123456789012"], min_amount_usd=100.0)
+        event = CostEvent(
+            event_id="evt-1",
+            source="budgets",
+            account_id="123456789012",
+            amount=100.0,
+            time_window="2025-01",
+        )
+        assert match.prefilter(event) is True
+
+        assert match.prefilter(event.model_copy(update={"source": "anomaly"})) is False
+        assert match.prefilter(event.model_copy(update={"account_id": "999999999999"})) is False
+        assert match.prefilter(event.model_copy(update={"amount": 99.99})) is False
+
+    def test_prefilter_recompiled_on_assignment(self):
+        """Test reassigning a match field refreshes the precompiled prefilter."""
+        match = PolicyMatch(source=["budgets"], account_ids=["123456789012"], min_amount_usd=100.0)
+        event = CostEvent(
+            event_id="evt-1",
+            source="anomaly",
+            account_id="123456789012",
+            amount=150.0,
+            time_window="2025-01",
+        )
+        assert match.prefilter(event) is False
+
+        match.source = ["budgets", "anomaly"]
+        assert match.prefilter(event) is True
+
+        match.min_amount_usd = 200.0
+        assert match.prefilter(event) is False
+
+    def test_prefilter_follows_model_copy_update(self):
+        """Test a model_copy(update=...) is prefiltered on its own field values."""
+        match = PolicyMatch(source=["budgets"], account_ids=["123456789012"], min_amount_usd=100.0)
+        event = CostEvent(
+            event_id="evt-1",
+            source="budgets",
+            account_id="123456789012",
+            amount=150.0,
+            time_window="2025-01",
+        )
+        assert match.prefilter(event) is True
+
+        stricter = match.model_copy(update={"min_amount_usd": 1000.0})
+        assert stricter.prefilter(event) is False
+
+        other_account = match.model_copy(update={"account_ids": ["999999999999"]})
+        assert other_account.prefilter(event) is False
+        assert match.prefilter(event) is True
+
+    def test_prefilter_follows_in_place_edits(self):
+        """Test in-place edits to the source/account lists refresh the prefilter."""
+        match = PolicyMatch(source=["budgets"], account_ids=["123456789012"], min_amount_usd=100.0)
+        event = CostEvent(
+            event_id="evt-1",
+            source="anomaly",
+            account_id="123456789012",
+            amount=150.0,
+            time_window="2025-01",
+        )
+        assert match.prefilter(event) is False
+
+        match.source.append("anomaly")
+        assert match.prefilter(event) is True
+
+        match.account_ids.clear()
+        assert match.prefilter(event) is False
+
 
 # ============================================================================
 # Principal Tests
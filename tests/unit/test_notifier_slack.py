@@ -17,6 +17,7 @@ from src.guardrails.notifier_slack import (
     SlackNotifier,
     generate_approval_url,
     get_cost_management_console_url,
+    get_http_session,
 )
 
 
@@ -49,6 +50,47 @@ class TestSlackNotifierInit:
         notifier = SlackNotifier("  https://hooks.slack.com/services/xxx  ")
         assert notifier.webhook_url == "https://hooks.slack.com/services/xxx"
 
+    def test_init_without_session(self):
+        """Test that no session is set by default."""
+        notifier = SlackNotifier("https://hooks.slack.com/services/xxx")
+        assert notifier.session is None
+
+
+class TestInjectedSession:
+    """Test sending through an injected HTTP session."""
+
+    def test_get_http_session_is_shared(self):
+        """Test that handlers share one requests.Session per container."""
+        session = get_http_session()
+
+        assert isinstance(session, requests.Session)
+        assert get_http_session() is session
+
+    def test_send_uses_injected_session(self):
+        """Test that an injected session is used instead of requests.post."""
+        session = MagicMock()
+        notifier = SlackNotifier("https://hooks.slack.com/services/xxx", session=session)
+
+        with patch("requests.post") as mock_post:
+            result = notifier._send_to_slack({"text": "hello"})
+
+        assert result is True
+        mock_post.assert_not_called()
+        session.post.assert_called_once_with(
+            "https://hooks.slack.com/services/xxx",
+            json={"text": "hello"},
+            headers={"Content-Type": "application/json"},
+            timeout=10,
+        )
+
+    def test_injected_session_request_error(self):
+        """Test that request errors from the session are handled."""
+        session = MagicMock()
+        session.post.side_effect = requests.exceptions.ConnectionError("refused")
+        notifier = SlackNotifier("https://hooks.slack.com/services/xxx", session=session)
+
+        assert notifier._send_to_slack({"text": "hello"}) is False
+
 
 class TestSendDryRunAlert:
     """Test dry-run alert notifications."""
@@ -4,6 +4,7 @@ Unit tests for PolicyEngine (src/guardrails/policy_engine.py).
 Tests policy evaluation logic, matching, exceptions, and YAML loading.
 """
 
+import json
 from datetime import datetime
 
 import pytest
@@ -22,6 +23,7 @@ from src.guardrails.models import (
 )
 from src.guardrails.policy_engine import (
     PolicyEngine,
+    PolicyIndex,
     load_policies_from_directory,
     load_policy_from_file,
     validate_policy_file,
@@ -316,6 +318,80 @@ class TestPolicyEngineTimeWindows:
         assert isinstance(is_exempted, bool)
 
 
+# ============================================================================
+# PolicyIndex Tests
+# ============================================================================
+
+
+def _policy(policy_id: str, min_amount: float, source: list[str] | None = None) -> GuardrailPolicy:
+    return GuardrailPolicy(
+        policy_id=policy_id,
+        mode="dry_run",
+        ttl_minutes=0,
+        match=PolicyMatch(
+            source=source or ["budgets"],
+            account_ids=["123456789012"],
+            min_amount_usd=min_amount,
+        ),
+        scope=PolicyScope(
+            principals=[
+                Principal(type="iam_role", arn="arn:aws:iam::123456789012:role/ci-deployer")
+            ]
+        ),
+        actions=[PolicyAction(type="notify_only")],
+        notify=NotificationSettings(slack_webhook_ssm_param="/guardrails/slack"),
+    )
+
+
+class TestPolicyIndex:
+    """Test PolicyIndex candidate lookup."""
+
+    def test_candidates_filtered_by_threshold(self, simple_event):
+        """Test only policies with min_amount_usd <= amount are candidates."""
+        index = PolicyIndex([_policy("high", 500.0), _policy("low", 100.0), _policy("mid", 250.0)])
+
+        candidates = index.candidates(simple_event)
+
+        assert [p.policy_id for p in candidates] == ["low", "mid"]
+
+    def test_candidates_preserve_priority_order(self, simple_event):
+        """Test candidates keep original list order, not threshold order."""
+        index = PolicyIndex([_policy("first", 200.0), _policy("second", 100.0)])
+
+        candidates = index.candidates(simple_event)
+
+        assert [p.policy_id for p in candidates] == ["first", "second"]
+
+    def test_candidates_filtered_by_source(self, simple_event):
+        """Test policies for other sources are not candidates."""
+        index = PolicyIndex(
+            [
+                _policy("anomaly-only", 100.0, ["anomaly"]),
+                _policy("both", 100.0, ["anomaly", "budgets"]),
+            ]
+        )
+
+        candidates = index.candidates(simple_event)
+
+        assert [p.policy_id for p in candidates] == ["both"]
+        assert len(index) == 2
+
+    def test_evaluate_candidates_same_as_full_scan(self, policy_engine, simple_event):
+        """Test evaluating candidates picks the same policy as evaluating all policies."""
+        policies = [
+            _policy("manual", 500.0),
+            _policy("anomaly", 100.0, ["anomaly"]),
+            _policy("dry-run", 100.0),
+        ]
+
+        full = policy_engine.evaluate(simple_event, policies)
+        indexed = policy_engine.evaluate(
+            simple_event, PolicyIndex(policies).candidates(simple_event)
+        )
+
+        assert indexed.matched_policy_id == full.matched_policy_id == "dry-run"
+
+
 # ============================================================================
 # YAML Loading Tests
 # ============================================================================
@@ -351,6 +427,65 @@ class TestPolicyLoading:
         assert policy.policy_id == "test-policy"
         assert policy.mode == "dry_run"
 
+    def test_load_policies_from_directory_mixed_formats(self, tmp_path):
+        """Test that JSON policy files load alongside YAML ones, in file name order."""
+        policy_data = {
+            "policy_id": "yaml-policy",
+            "mode": "dry_run",
+            "ttl_minutes": 0,
+            "match": {
+                "source": ["budgets"],
+                "account_ids": ["123456789012"],
+                "min_amount_usd": 100.0,
+            },
+            "scope": {
+                "principals": [{"type": "iam_role", "arn": "arn:aws:iam::123456789012:role/ci"}]
+            },
+            "actions": [{"type": "notify_only"}],
+            "notify": {"slack_webhook_ssm_param": "/guardrails/slack"},
+        }
+        (tmp_path / "2-policy.yaml").write_text(yaml.dump(policy_data))
+        (tmp_path / "1-policy.json").write_text(
+            json.dumps({**policy_data, "policy_id": "json-policy"})
+        )
+        (tmp_path / "README.md").write_text("not a policy")
+
+        policies = load_policies_from_directory(tmp_path)
+
+        assert [p.policy_id for p in policies] == ["json-policy", "yaml-policy"]
+
+    def test_load_policies_from_directory_custom_pattern(self, tmp_path):
+        """Test that an explicit pattern restricts which files are loaded."""
+        policy_data = {
+            "policy_id": "json-policy",
+            "mode": "dry_run",
+            "ttl_minutes": 0,
+            "match": {
+                "source": ["budgets"],
+                "account_ids": ["123456789012"],
+                "min_amount_usd": 100.0,
+            },
+            "scope": {
+                "principals": [{"type": "iam_role", "arn": "arn:aws:iam::123456789012:role/ci"}]
+            },
+            "actions": [{"type": "notify_only"}],
+            "notify": {"slack_webhook_ssm_param": "/guardrails/slack"},
+        }
+        (tmp_path / "policy.json").write_text(json.dumps(policy_data))
+
+        assert load_policies_from_directory(tmp_path, pattern="*.yaml") == []
+        assert len(load_policies_from_directory(tmp_path, pattern="*.json")) == 1
+
+    def test_validate_policy_file_invalid_json(self, tmp_path):
+        """Test validating a JSON file with a syntax error."""
+        policy_file = tmp_path / "invalid.json"
+        policy_file.write_text('{"policy_id": ')
+
+        is_valid, error = validate_policy_file(policy_file)
+
+        assert is_valid is False
+        assert "json syntax error" in error.lower()
+
     def test_load_policy_file_not_found(self):
         """Test loading from non-existent file raises error."""
         with pytest.raises(FileNotFoundError):
@@ -417,6 +552,63 @@ class TestPolicyLoading:
         assert len(policies) == 1
         assert policies[0].policy_id == "policy-1"
 
+    def test_load_many_policies_preserves_file_order(self, tmp_path):
+        """Test directories large enough for parallel reads keep file name order."""
+        for i in range(12):
+            policy_data = {
+                "policy_id": f"policy-{i:02d}",
+                "mode": "dry_run",
+                "ttl_minutes": 0,
+                "match": {
+                    "source": ["budgets"],
+                    "account_ids": ["123456789012"],
+                    "min_amount_usd": 100.0,
+                },
+                "scope": {
+                    "principals": [{"type": "iam_role", "arn": "arn:aws:iam::123456789012:role/ci"}]
+                },
+                "actions": [{"type": "notify_only"}],
+                "notify": {"slack_webhook_ssm_param": "/guardrails/slack"},
+            }
+
+            with open(tmp_path / f"policy-{i:02d}.yaml", "w") as f:
+                yaml.dump(policy_data, f)
+
+        # An invalid file in the middle must not stop the others from loading
+        (tmp_path / "policy-05a.yaml").write_text("invalid: yaml: content:")
+
+        policies = load_policies_from_directory(tmp_path)
+
+        assert [p.policy_id for p in policies] == [f"policy-{i:02d}" for i in range(12)]
+
+    def test_load_policies_interns_shared_strings(self, tmp_path):
+        """Test repeated identifiers across policy files share one string object."""
+        for i in range(2):
+            policy_data = {
+                "policy_id": f"policy-{i}",
+                "mode": "dry_run",
+                "ttl_minutes": 0,
+                "match": {
+                    "source": ["budgets"],
+                    "account_ids": ["123456789012"],
+                    "min_amount_usd": 100.0,
+                },
+                "scope": {
+                    "principals": [{"type": "iam_role", "arn": "arn:aws:iam::123456789012:role/ci"}]
+                },
+                "actions": [{"type": "attach_deny_policy", "deny": ["ec2:RunInstances"]}],
+                "notify": {"slack_webhook_ssm_param": "/guardrails/slack"},
+            }
+
+            with open(tmp_path / f"policy-{i}.yaml", "w") as f:
+                yaml.dump(policy_data, f)
+
+        first, second = load_policies_from_directory(tmp_path)
+
+        assert first.match.account_ids[0] is second.match.account_ids[0]
+        assert first.scope.principals[0].arn is second.scope.principals[0].arn
+        assert first.actions[0].deny[0] is second.actions[0].deny[0]
+
     def test_load_policies_directory_not_found(self):
         """Test loading from non-existent directory raises error."""
         with pytest.raises(FileNotFoundError):
@@ -460,6 +652,16 @@ class TestPolicyLoading:
         assert is_valid is False
         assert "yaml" in error.lower() or "syntax" in error.lower()
 
+    def test_validate_policy_file_not_a_mapping(self, tmp_path):
+        """Test validating a YAML file whose document is not a mapping."""
+        policy_file = tmp_path / "list.yaml"
+        policy_file.write_text("- policy_id: not-a-mapping\n")
+
+        is_valid, error = validate_policy_file(policy_file)
+
+        assert is_valid is False
+        assert "validation error" in error.lower()
+
     def test_validate_policy_file_validation_error(self, tmp_path):
         """Test validating a YAML file with validation errors."""
         policy_data = {